@@ -5,12 +5,59 @@
 负责跟踪用户信息收集进度，管理多轮对话状态
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from collections import deque
+from collections.abc import Sequence
 from enum import Enum
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from itertools import combinations
 import json
 import re
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from keyword_matcher import KeywordMatcher
+
+
+# 薪资模式匹配（合并为单个预编译模式，一次扫描即可判断）
+_SALARY_COMBINED = re.compile(
+    r'(?:\d+-\d+[kK万]'            # 15-20K, 15-20万
+    r'|\d+[kK万](?:以上|左右)?'      # 20K以上, 15K左右, 15万
+    r'|\d+千(?:-\d+千|以上)?)'      # 8千-12千, 10千以上, 8千
+)
+_HAS_DIGIT = re.compile(r'\d+')
+
+# 常见职位关键词
+_JOB_KEYWORDS = (
+    "开发", "工程师", "程序员", "设计师", "产品经理", "运营", "销售", 
+    "市场", "人事", "财务", "客服", "测试", "数据", "算法", "前端", 
+    "后端", "全栈", "移动", "安卓", "iOS", "UI", "UX", "Java", 
+    "Python", "JavaScript", "React", "Vue", "Node"
+)
+
+# 常见城市名称
+_CITIES = (
+    "北京", "上海", "广州", "深圳", "杭州", "南京", "苏州", "成都", 
+    "武汉", "西安", "重庆", "天津", "青岛", "大连", "厦门", "长沙",
+    "郑州", "济南", "合肥", "福州", "昆明", "南昌", "贵阳", "海口"
+)
+
+# 职位关键词统一在导入时转为小写，匹配时只需对用户输入做一次 lower()
+_JOB_KW_LOWER = tuple(kw.lower() for kw in _JOB_KEYWORDS)
+
+_JOB_KEYWORD_SET = frozenset(_JOB_KW_LOWER)
+_CITY_SET = frozenset(_CITIES)
+
+_JOB_MATCHER = KeywordMatcher(_JOB_KW_LOWER)
+_CITY_MATCHER = KeywordMatcher(_CITIES)
+
+# 必需字段（按收集顺序）
+_REQUIRED_FIELDS = ("job_type", "location", "salary")
+
 
 class ConversationStage(Enum):
     """对话阶段枚举"""
@@ -24,6 +71,49 @@ class ConversationStage(Enum):
     COMPLETED = "completed"               # 完成
 
 
+# 阶段对应的字符串值，热路径中用字典查找代替 Enum.value 描述符访问
+STAGE_VALUES = {stage: stage.value for stage in ConversationStage}
+
+
+# 必需字段对应的收集阶段
+_FIELD_STAGES = {
+    "job_type": ConversationStage.COLLECTING_JOB_TYPE,
+    "location": ConversationStage.COLLECTING_LOCATION,
+    "salary": ConversationStage.COLLECTING_SALARY,
+}
+
+
+def _build_stage_transitions() -> Dict[Tuple[ConversationStage, Tuple[str, ...]], ConversationStage]:
+    """预计算阶段转移表：(当前阶段, 缺失的必需字段) -> 下一阶段"""
+    # 收集阶段：按顺序检查之后仍需收集的字段，全部已收集则进入搜索
+    collect_order = {
+        ConversationStage.GREETING: _REQUIRED_FIELDS,
+        ConversationStage.COLLECTING_JOB_TYPE: ("location", "salary"),
+        ConversationStage.COLLECTING_LOCATION: ("salary",),
+        ConversationStage.COLLECTING_SALARY: (),
+    }
+    # 与收集进度无关的固定转移
+    fixed = {
+        ConversationStage.SEARCHING: ConversationStage.SHOWING_RESULTS,
+        ConversationStage.SHOWING_RESULTS: ConversationStage.COMPLETED,
+    }
+    
+    transitions = {}
+    for count in range(len(_REQUIRED_FIELDS) + 1):
+        for missing in combinations(_REQUIRED_FIELDS, count):
+            for stage, order in collect_order.items():
+                transitions[(stage, missing)] = next(
+                    (_FIELD_STAGES[name] for name in order if name in missing),
+                    ConversationStage.SEARCHING
+                )
+            for stage, next_stage in fixed.items():
+                transitions[(stage, missing)] = next_stage
+    return transitions
+
+
+_STAGE_TRANSITIONS = _build_stage_transitions()
+
+
 @dataclass
 class UserRequirements:
     """用户需求数据类"""
@@ -34,33 +124,137 @@ class UserRequirements:
     education: Optional[str] = None         # 学历要求（可选）
     company_size: Optional[str] = None      # 公司规模（可选）
     industry: Optional[str] = None          # 行业偏好（可选）
+    _missing_cache: Optional[Tuple[str, ...]] = field(default=None, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        # 必需字段变化时使缺失字段缓存失效
+        if name in _REQUIRED_FIELDS:
+            super().__setattr__("_missing_cache", None)
     
-    def get_missing_required_fields(self) -> List[str]:
-        """获取缺失的必需字段"""
-        missing = []
-        if not self.job_type:
-            missing.append("job_type")
-        if not self.location:
-            missing.append("location")
-        if not self.salary:
-            missing.append("salary")
-        return missing
+    def get_missing_required_fields(self) -> Tuple[str, ...]:
+        """获取缺失的必需字段（结果会被缓存，直到必需字段发生变化）"""
+        if self._missing_cache is None:
+            self._missing_cache = tuple(
+                name for name in _REQUIRED_FIELDS if not getattr(self, name)
+            )
+        return self._missing_cache
     
     def is_complete(self) -> bool:
         """检查必需信息是否完整"""
-        return len(self.get_missing_required_fields()) == 0
+        return not self.get_missing_required_fields()
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
+        data = self.__dict__.copy()
+        data.pop("_missing_cache", None)
+        return data
+
+
+# 对话历史最多保留的条数（处理器只需要最近的上下文）
+MAX_HISTORY_LENGTH = 40
+
+# 允许通过 update_requirements 更新的需求字段
+_ALLOWED_FIELDS = frozenset(f.name for f in fields(UserRequirements) if f.init)
+
+
+class ConversationHistory(Sequence):
+    """
+    对话历史
+    
+    每条记录以 (role, content, stage) 元组紧凑存储，
+    只有在处理器读取时才按需生成 {"role", "content", "stage"} 字典；
+    超过 max_length 条时自动丢弃最早的记录
+    """
+    
+    __slots__ = ("_entries",)
+    
+    def __init__(self, max_length: int = MAX_HISTORY_LENGTH):
+        self._entries: deque = deque(maxlen=max_length)
+    
+    @staticmethod
+    def _as_dict(entry: Tuple[str, str, str]) -> Dict[str, str]:
+        role, content, stage = entry
+        return {"role": role, "content": content, "stage": stage}
+    
+    def append(self, role: str, content: str, stage: str):
+        """追加一条对话记录"""
+        self._entries.append((role, content, stage))
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # deque 不支持切片，按下标取出（通常只取末尾几条，访问两端为 O(1)）
+            return [self._as_dict(self._entries[i]) for i in range(len(self._entries))[index]]
+        return self._as_dict(self._entries[index])
+    
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return map(self._as_dict, self._entries)
+    
+    def to_list(self) -> List[Dict[str, str]]:
+        """转换为字典列表"""
+        return list(self)
+
+
+# 以下解析函数均为纯函数，按去除首尾空白后的输入缓存结果
+# 返回 (提取的值, 置信度)，未能提取时值为 None
+
+@lru_cache(maxsize=4096)
+def _match_job_type(user_input_clean: str, user_input_lower: str) -> Tuple[Optional[str], float]:
+    """解析职位类型（user_input_lower 为 user_input_clean 的小写形式）"""
+    # 用户只输入了一个关键词时直接命中
+    if user_input_lower in _JOB_KEYWORD_SET:
+        return user_input_clean, 0.8
+    
+    if _JOB_MATCHER.search(user_input_lower):
+        return user_input_clean, 0.8
+    if any(char.isalpha() for char in user_input_clean):
+        return user_input_clean, 0.6
+    return None, 0.0
+
+
+@lru_cache(maxsize=4096)
+def _match_location(user_input_clean: str) -> Tuple[Optional[str], float]:
+    """解析工作地点"""
+    # 用户只输入了城市名时直接命中，无需扫描
+    if user_input_clean in _CITY_SET:
+        return user_input_clean, 0.9
+    
+    found_city = _CITY_MATCHER.search(user_input_clean)
+    if found_city:
+        return found_city, 0.9
+    if any(char.isalpha() for char in user_input_clean):
+        return user_input_clean, 0.6
+    return None, 0.0
+
+
+@lru_cache(maxsize=4096)
+def _match_salary(user_input_clean: str) -> Tuple[Optional[str], float]:
+    """解析薪资期望"""
+    if _SALARY_COMBINED.search(user_input_clean):
+        return user_input_clean, 0.8
+    
+    # 如果包含数字，可能是薪资
+    if _HAS_DIGIT.search(user_input_clean):
+        return user_input_clean, 0.5
+    return None, 0.0
+
+
+def _build_parse_result(field_name: str, value: Optional[str], confidence: float) -> Dict[str, Any]:
+    """构建解析结果字典（每次返回新对象，避免调用方修改缓存）"""
+    if value is None:
         return {
-            "job_type": self.job_type,
-            "location": self.location,
-            "salary": self.salary,
-            "experience": self.experience,
-            "education": self.education,
-            "company_size": self.company_size,
-            "industry": self.industry
+            "extracted_info": {},
+            "confidence": 0.0,
+            "needs_clarification": True
         }
+    return {
+        "extracted_info": {field_name: value},
+        "confidence": confidence,
+        "needs_clarification": False
+    }
 
 
 class ConversationStateManager:
@@ -69,18 +263,14 @@ class ConversationStateManager:
     def __init__(self):
         self.stage = ConversationStage.GREETING
         self.requirements = UserRequirements()
-        self.conversation_history: List[Dict[str, str]] = []
+        self.conversation_history = ConversationHistory()
         self.search_results: List[Any] = []
         self.current_question_attempts = 0  # 当前问题尝试次数
         self.max_attempts = 3  # 最大尝试次数
         
     def add_conversation(self, role: str, content: str):
         """添加对话记录"""
-        self.conversation_history.append({
-            "role": role,
-            "content": content,
-            "stage": self.stage.value
-        })
+        self.conversation_history.append(role, content, STAGE_VALUES[self.stage])
     
     def get_current_stage(self) -> ConversationStage:
         """获取当前对话阶段"""
@@ -88,198 +278,97 @@ class ConversationStateManager:
     
     def advance_to_next_stage(self):
         """推进到下一个阶段"""
-        if self.stage == ConversationStage.GREETING:
-            # 检查哪个必需信息缺失，优先收集
-            missing = self.requirements.get_missing_required_fields()
-            if "job_type" in missing:
-                self.stage = ConversationStage.COLLECTING_JOB_TYPE
-            elif "location" in missing:
-                self.stage = ConversationStage.COLLECTING_LOCATION
-            elif "salary" in missing:
-                self.stage = ConversationStage.COLLECTING_SALARY
-            else:
-                self.stage = ConversationStage.SEARCHING
-                
-        elif self.stage == ConversationStage.COLLECTING_JOB_TYPE:
-            missing = self.requirements.get_missing_required_fields()
-            if "location" in missing:
-                self.stage = ConversationStage.COLLECTING_LOCATION
-            elif "salary" in missing:
-                self.stage = ConversationStage.COLLECTING_SALARY
-            else:
-                self.stage = ConversationStage.SEARCHING
-                
-        elif self.stage == ConversationStage.COLLECTING_LOCATION:
-            missing = self.requirements.get_missing_required_fields()
-            if "salary" in missing:
-                self.stage = ConversationStage.COLLECTING_SALARY
-            else:
-                self.stage = ConversationStage.SEARCHING
-                
-        elif self.stage == ConversationStage.COLLECTING_SALARY:
-            self.stage = ConversationStage.SEARCHING
-            
-        elif self.stage == ConversationStage.SEARCHING:
-            self.stage = ConversationStage.SHOWING_RESULTS
-            
-        elif self.stage == ConversationStage.SHOWING_RESULTS:
-            self.stage = ConversationStage.COMPLETED
+        missing = self.requirements.get_missing_required_fields()
+        self.stage = _STAGE_TRANSITIONS.get((self.stage, missing), self.stage)
         
         # 重置尝试次数
         self.current_question_attempts = 0
     
     def update_requirements(self, field: str, value: str) -> bool:
         """更新用户需求信息"""
-        if hasattr(self.requirements, field):
+        if field in _ALLOWED_FIELDS:
+            # 由 UserRequirements.__setattr__ 负责使缺失字段缓存失效
             setattr(self.requirements, field, value)
             return True
         return False
     
     def parse_user_input(self, user_input: str) -> Dict[str, Any]:
         """解析用户输入，提取相关信息"""
-        result = {
-            "extracted_info": {},
-            "confidence": 0.0,
-            "needs_clarification": False
-        }
-        
-        user_input_lower = user_input.lower().strip()
+        # 统一规范化一次，各解析方法直接使用
+        user_input_clean = user_input.strip()
         
         # 根据当前阶段解析不同类型的信息
         if self.stage == ConversationStage.COLLECTING_JOB_TYPE:
-            result = self._parse_job_type(user_input)
+            return self._parse_job_type(user_input_clean, user_input_clean.lower())
         elif self.stage == ConversationStage.COLLECTING_LOCATION:
-            result = self._parse_location(user_input)
+            return self._parse_location(user_input_clean)
         elif self.stage == ConversationStage.COLLECTING_SALARY:
-            result = self._parse_salary(user_input)
-        
-        return result
-    
-    def _parse_job_type(self, user_input: str) -> Dict[str, Any]:
-        """解析职位类型"""
-        # 常见职位关键词
-        job_keywords = [
-            "开发", "工程师", "程序员", "设计师", "产品经理", "运营", "销售", 
-            "市场", "人事", "财务", "客服", "测试", "数据", "算法", "前端", 
-            "后端", "全栈", "移动", "安卓", "iOS", "UI", "UX", "Java", 
-            "Python", "JavaScript", "React", "Vue", "Node"
-        ]
-        
-        user_input_lower = user_input.lower()
-        found_keywords = [kw for kw in job_keywords if kw.lower() in user_input_lower]
-        
-        if found_keywords or any(char.isalpha() for char in user_input):
-            return {
-                "extracted_info": {"job_type": user_input.strip()},
-                "confidence": 0.8 if found_keywords else 0.6,
-                "needs_clarification": False
-            }
+            return self._parse_salary(user_input_clean)
         
         return {
             "extracted_info": {},
             "confidence": 0.0,
-            "needs_clarification": True
+            "needs_clarification": False
         }
     
-    def _parse_location(self, user_input: str) -> Dict[str, Any]:
-        """解析工作地点"""
-        # 常见城市名称
-        cities = [
-            "北京", "上海", "广州", "深圳", "杭州", "南京", "苏州", "成都", 
-            "武汉", "西安", "重庆", "天津", "青岛", "大连", "厦门", "长沙",
-            "郑州", "济南", "合肥", "福州", "昆明", "南昌", "贵阳", "海口"
-        ]
-        
-        user_input_clean = user_input.strip()
-        found_cities = [city for city in cities if city in user_input_clean]
-        
-        if found_cities:
-            return {
-                "extracted_info": {"location": found_cities[0]},
-                "confidence": 0.9,
-                "needs_clarification": False
-            }
-        elif any(char.isalpha() for char in user_input_clean):
-            return {
-                "extracted_info": {"location": user_input_clean},
-                "confidence": 0.6,
-                "needs_clarification": False
-            }
-        
-        return {
-            "extracted_info": {},
-            "confidence": 0.0,
-            "needs_clarification": True
-        }
+    def _parse_job_type(self, user_input_clean: str, user_input_lower: str) -> Dict[str, Any]:
+        """解析职位类型（输入需已去除首尾空白）"""
+        return _build_parse_result("job_type", *_match_job_type(user_input_clean, user_input_lower))
     
-    def _parse_salary(self, user_input: str) -> Dict[str, Any]:
-        """解析薪资期望"""
-        # 薪资模式匹配
-        salary_patterns = [
-            r'(\d+)-(\d+)[kK万]',  # 15-20K, 15-20万
-            r'(\d+)[kK万]以上',     # 20K以上, 20万以上
-            r'(\d+)[kK万]左右',     # 15K左右
-            r'(\d+)[kK万]',        # 15K, 15万
-            r'(\d+)千-(\d+)千',     # 8千-12千
-            r'(\d+)千以上',        # 10千以上
-            r'(\d+)千',           # 8千
-        ]
-        
-        user_input_clean = user_input.strip()
-        
-        for pattern in salary_patterns:
-            match = re.search(pattern, user_input_clean)
-            if match:
-                return {
-                    "extracted_info": {"salary": user_input_clean},
-                    "confidence": 0.8,
-                    "needs_clarification": False
-                }
-        
-        # 如果包含数字，可能是薪资
-        if re.search(r'\d+', user_input_clean):
-            return {
-                "extracted_info": {"salary": user_input_clean},
-                "confidence": 0.5,
-                "needs_clarification": False
-            }
-        
-        return {
-            "extracted_info": {},
-            "confidence": 0.0,
-            "needs_clarification": True
-        }
+    def _parse_location(self, user_input_clean: str) -> Dict[str, Any]:
+        """解析工作地点（输入需已去除首尾空白）"""
+        return _build_parse_result("location", *_match_location(user_input_clean))
+    
+    def _parse_salary(self, user_input_clean: str) -> Dict[str, Any]:
+        """解析薪资期望（输入需已去除首尾空白）"""
+        return _build_parse_result("salary", *_match_salary(user_input_clean))
     
-    def get_progress_summary(self) -> Dict[str, Any]:
-        """获取进度摘要"""
+    def get_progress_summary(self, requirements_dict: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        获取进度摘要
+        
+        Args:
+            requirements_dict: 已生成的需求字典，传入时直接复用
+        """
         missing_fields = self.requirements.get_missing_required_fields()
-        total_required = 3  # job_type, location, salary
+        total_required = len(_REQUIRED_FIELDS)
         completed_required = total_required - len(missing_fields)
         
+        if requirements_dict is None:
+            requirements_dict = self.requirements.to_dict()
+        
         return {
-            "stage": self.stage.value,
+            "stage": STAGE_VALUES[self.stage],
             "progress_percentage": (completed_required / total_required) * 100,
             "completed_fields": completed_required,
             "total_required_fields": total_required,
-            "missing_fields": missing_fields,
-            "requirements": self.requirements.to_dict(),
-            "is_ready_for_search": self.requirements.is_complete()
+            "missing_fields": list(missing_fields),
+            "requirements": requirements_dict,
+            "is_ready_for_search": not missing_fields
         }
     
     def reset(self):
         """重置对话状态"""
         self.stage = ConversationStage.GREETING
         self.requirements = UserRequirements()
-        self.conversation_history = []
+        self.conversation_history = ConversationHistory()
         self.search_results = []
         self.current_question_attempts = 0
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
+        requirements_dict = self.requirements.to_dict()
         return {
-            "stage": self.stage.value,
-            "requirements": self.requirements.to_dict(),
-            "conversation_history": self.conversation_history,
+            "stage": STAGE_VALUES[self.stage],
+            "requirements": requirements_dict,
+            "conversation_history": self.conversation_history.to_list(),
             "current_question_attempts": self.current_question_attempts,
-            "progress": self.get_progress_summary()
+            "progress": self.get_progress_summary(requirements_dict)
         }
+    
+    def to_json(self) -> str:
+        """转换为JSON字符串（优先使用 orjson）"""
+        data = self.to_dict()
+        if orjson is not None:
+            return orjson.dumps(data).decode()
+        return json.dumps(data, ensure_ascii=False)
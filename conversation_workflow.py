@@ -5,9 +5,13 @@
 负责根据对话状态智能生成问题，控制整个对话流程
 """
 
+import copy
 import random
-from typing import Dict, List, Optional, Any
-from conversation_state import ConversationStateManager, ConversationStage
+import re
+from functools import cached_property, lru_cache
+from itertools import cycle
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from conversation_state import ConversationStateManager, ConversationStage, STAGE_VALUES
 from qa_chain import create_llm
 from intelligent_workflow_processor import IntelligentWorkflowProcessor
 from langchain_conversation_processor import LangChainConversationProcessor
@@ -15,16 +19,31 @@ from modern_langchain_processor import ModernLangChainProcessor
 import json
 
 
+# 构建搜索查询时从薪资中去除的修饰词
+_SALARY_STRIP = re.compile(r'以上|左右|面议')
+
+
+@lru_cache(maxsize=1)
+def _get_intelligent_processor() -> IntelligentWorkflowProcessor:
+    """获取共享的智能处理器（无会话状态，进程内复用）"""
+    return IntelligentWorkflowProcessor()
+
+
 class ConversationWorkflowEngine:
     """智能对话工作流引擎"""
     
     def __init__(self):
         self.state_manager = ConversationStateManager()
-        self.llm = None
-        self.intelligent_processor = IntelligentWorkflowProcessor()
-        self.langchain_processor = LangChainConversationProcessor()
-        self.modern_processor = ModernLangChainProcessor()
-        self._initialize_llm()
+        # 上一轮的 (阶段, 用户输入, 响应)，用于直接应答重复发送的消息
+        self._last_turn: Optional[Tuple[ConversationStage, str, Dict[str, Any]]] = None
+        
+        # 处理器回退链：(名称, 图标, 获取处理器, 额外参数)，按顺序尝试
+        self._processor_chain = [
+            ("现代LangChain", "🚀", lambda: self.modern_processor, {"thread_id": "main_conversation"}),
+            ("传统LangChain", "🔗", lambda: self.langchain_processor, {}),
+        ]
+        # 本会话中已失败过的处理器，之后直接跳过
+        self._dead_processors = set()
         
         # 预定义的问题模板
         self.question_templates = {
@@ -84,19 +103,49 @@ class ConversationWorkflowEngine:
                 "关于薪资，请给出一个数字范围，这样我能筛选合适的职位。"
             ]
         }
+        
+        # 模板预先打乱后循环取用，保证轮换均匀且每轮无需随机选择
+        self._question_cycles = self._build_template_cycles(self.question_templates)
+        self._clarification_cycles = self._build_template_cycles(self.clarification_templates)
+        self._retry_cycles = self._build_template_cycles(self.retry_templates)
     
-    def _initialize_llm(self):
-        """初始化大语言模型"""
+    @staticmethod
+    def _build_template_cycles(templates: Dict[Any, List[str]]) -> Dict[Any, Iterator[str]]:
+        """为每组模板构建打乱顺序后的循环迭代器"""
+        return {
+            key: cycle(random.sample(options, len(options)))
+            for key, options in templates.items()
+        }
+    
+    @cached_property
+    def llm(self):
+        """大语言模型（首次使用时初始化）"""
         try:
-            self.llm = create_llm(streaming=False)
+            return create_llm(streaming=False)
         except Exception as e:
             print(f"初始化LLM失败: {e}")
-            self.llm = None
+            return None
+    
+    @cached_property
+    def modern_processor(self) -> ModernLangChainProcessor:
+        """现代LangChain处理器（持有会话记忆，按引擎实例懒加载）"""
+        return ModernLangChainProcessor()
+    
+    @cached_property
+    def langchain_processor(self) -> LangChainConversationProcessor:
+        """传统LangChain处理器（持有会话记忆，按引擎实例懒加载）"""
+        return LangChainConversationProcessor()
+    
+    @property
+    def intelligent_processor(self) -> IntelligentWorkflowProcessor:
+        """智能处理器（无会话状态，所有引擎共享）"""
+        return _get_intelligent_processor()
     
     def start_conversation(self) -> str:
         """开始对话"""
         self.state_manager.reset()
-        greeting = random.choice(self.question_templates[ConversationStage.GREETING])
+        self._last_turn = None
+        greeting = next(self._question_cycles[ConversationStage.GREETING])
         self.state_manager.add_conversation("assistant", greeting)
         # 推进到收集职位类型阶段，准备接收用户的第一个回答
         self.state_manager.advance_to_next_stage()
@@ -107,39 +156,22 @@ class ConversationWorkflowEngine:
         if not user_input.strip():
             return {
                 "response": "请告诉我一些信息，这样我能更好地帮助您。",
-                "stage": self.state_manager.stage.value,
+                "stage": STAGE_VALUES[self.state_manager.stage],
                 "progress": self.state_manager.get_progress_summary()
             }
         
         # 记录用户输入
         self.state_manager.add_conversation("user", user_input)
         
-        # 优先使用最新的现代LangChain处理器
-        try:
-            parse_result = self.modern_processor.process_user_input(
-                user_input,
-                self.state_manager.stage,
-                self.state_manager.conversation_history,
-                thread_id="main_conversation"
-            )
-            print(f"🚀 现代LangChain处理结果: 理解={parse_result.get('understood')}, 置信度={parse_result.get('confidence', 0):.2f}")
-        except Exception as e:
-            print(f"⚠️ 现代LangChain处理失败，回退到传统LangChain: {e}")
-            try:
-                parse_result = self.langchain_processor.process_user_input(
-                    user_input,
-                    self.state_manager.stage,
-                    self.state_manager.conversation_history
-                )
-                print(f"🔗 传统LangChain处理结果: 理解={parse_result.get('understood')}, 置信度={parse_result.get('confidence', 0):.2f}")
-            except Exception as e2:
-                print(f"⚠️ 传统LangChain也失败，回退到智能处理器: {e2}")
-                # 最后回退到原有的智能处理器
-                parse_result = self.intelligent_processor.process_user_input(
-                    user_input,
-                    self.state_manager.stage,
-                    self.state_manager.conversation_history
-                )
+        # 同一阶段重复发送相同内容时直接复用上一轮的响应
+        stage = self.state_manager.stage
+        user_input_clean = user_input.strip()
+        if self._last_turn and self._last_turn[0] == stage and self._last_turn[1] == user_input_clean:
+            cached_result = self._last_turn[2]
+            self.state_manager.add_conversation("assistant", cached_result["response"])
+            return copy.deepcopy(cached_result)
+        
+        parse_result = self._process_with_fallback(user_input)
         
         # 根据解析结果生成响应
         response = self._generate_response(user_input, parse_result)
@@ -147,14 +179,41 @@ class ConversationWorkflowEngine:
         # 记录助手响应
         self.state_manager.add_conversation("assistant", response["message"])
         
-        return {
+        result = {
             "response": response["message"],
-            "stage": self.state_manager.stage.value,
+            "stage": STAGE_VALUES[self.state_manager.stage],
             "progress": self.state_manager.get_progress_summary(),
             "extracted_info": parse_result.get("extracted_info", {}),
             "confidence": parse_result.get("confidence", 0.0),
             "ready_for_search": self.state_manager.requirements.is_complete()
         }
+        # 只缓存已理解的轮次，未理解的重复输入仍需累计尝试次数，以便升级到LLM响应
+        if parse_result.get("understood") and parse_result.get("extracted_info"):
+            self._last_turn = (stage, user_input_clean, copy.deepcopy(result))
+        else:
+            self._last_turn = None
+        return result
+    
+    def _process_with_fallback(self, user_input: str) -> Dict[str, Any]:
+        """依次尝试各处理器，失败的处理器在本会话中不再重试"""
+        stage = self.state_manager.stage
+        history = self.state_manager.conversation_history
+        
+        for name, icon, get_processor, extra_kwargs in self._processor_chain:
+            if name in self._dead_processors:
+                continue
+            try:
+                parse_result = get_processor().process_user_input(
+                    user_input, stage, history, **extra_kwargs
+                )
+                print(f"{icon} {name}处理结果: 理解={parse_result.get('understood')}, 置信度={parse_result.get('confidence', 0):.2f}")
+                return parse_result
+            except Exception as e:
+                print(f"⚠️ {name}处理失败，本会话后续将跳过: {e}")
+                self._dead_processors.add(name)
+        
+        # 最后回退到原有的智能处理器
+        return self.intelligent_processor.process_user_input(user_input, stage, history)
     
     def _generate_response(self, user_input: str, parse_result: Dict[str, Any]) -> Dict[str, str]:
         """根据解析结果生成响应"""
@@ -195,7 +254,7 @@ class ConversationWorkflowEngine:
             field_value = list(extracted_info.values())[0]
 
             if field_name in self.clarification_templates:
-                clarification = random.choice(self.clarification_templates[field_name])
+                clarification = next(self._clarification_cycles[field_name])
                 return {
                     "message": clarification.format(**{field_name: field_value})
                 }
@@ -221,7 +280,7 @@ class ConversationWorkflowEngine:
 
             if current_stage in field_map:
                 field = field_map[current_stage]
-                retry_msg = random.choice(self.retry_templates[field])
+                retry_msg = next(self._retry_cycles[field])
                 return {"message": retry_msg}
 
             return {"message": "抱歉，我没有理解您的意思。请再试一次。"}
@@ -246,7 +305,7 @@ class ConversationWorkflowEngine:
         current_stage = self.state_manager.stage
         
         if current_stage in self.question_templates:
-            return random.choice(self.question_templates[current_stage])
+            return next(self._question_cycles[current_stage])
         
         return "请继续告诉我您的需求。"
     
@@ -267,7 +326,7 @@ class ConversationWorkflowEngine:
     def _generate_llm_response(self, user_input: str) -> str:
         """使用LLM生成个性化响应"""
         try:
-            current_stage = self.state_manager.stage.value
+            current_stage = STAGE_VALUES[self.state_manager.stage]
             missing_fields = self.state_manager.requirements.get_missing_required_fields()
             
             prompt = f"""你是一个友好的求职助手，正在帮助用户收集求职需求。
@@ -307,7 +366,7 @@ class ConversationWorkflowEngine:
             query_parts.append(req.location)
         if req.salary:
             # 简化薪资信息用于搜索
-            salary_clean = req.salary.replace("以上", "").replace("左右", "").replace("面议", "")
+            salary_clean = _SALARY_STRIP.sub("", req.salary)
             if salary_clean.strip():
                 query_parts.append(salary_clean.strip())
         
@@ -320,3 +379,4 @@ class ConversationWorkflowEngine:
     def reset_conversation(self):
         """重置对话"""
         self.state_manager.reset()
+        self._last_turn = None
@@ -6,120 +6,193 @@
 
 import requests
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+BASE_URL = "http://localhost:8000"
+
+# 每个线程复用自己的会话，保持 keep-alive 连接，避免每次请求重新握手（Session 不保证线程安全）
+_sessions = threading.local()
+
+
+def get_session() -> requests.Session:
+    """获取当前线程的会话"""
+    session = getattr(_sessions, "session", None)
+    if session is None:
+        session = _sessions.session = requests.Session()
+    return session
+
+
+def parse_json(response: requests.Response) -> Any:
+    """解析响应JSON（优先使用 orjson）"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def format_json(data: Any) -> str:
+    """格式化输出JSON（优先使用 orjson）"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+# 并发执行时每个线程把输出写入自己的缓冲区，结束后按顺序统一打印
+_output = threading.local()
+
+
+def log(message: str = ""):
+    """输出测试信息"""
+    buffer = getattr(_output, "buffer", None)
+    if buffer is None:
+        print(message)
+    else:
+        buffer.append(message)
+
+
+def _run_buffered(test_func: Callable[[], None]) -> str:
+    """在当前线程执行测试并返回其输出"""
+    _output.buffer = []
+    try:
+        test_func()
+        return "\n".join(_output.buffer)
+    finally:
+        _output.buffer = None
+
+
+def run_concurrently(test_funcs: List[Callable[[], None]]) -> List[str]:
+    """并发执行相互独立的测试，按传入顺序返回各自的输出"""
+    with ThreadPoolExecutor(max_workers=len(test_funcs)) as executor:
+        return list(executor.map(_run_buffered, test_funcs))
 
 
 def test_health():
     """测试健康检查"""
-    print("🔍 测试健康检查...")
+    log("🔍 测试健康检查...")
     try:
-        response = requests.get("http://localhost:8000/health")
-        print(f"状态码: {response.status_code}")
+        response = get_session().get(f"{BASE_URL}/health")
+        log(f"状态码: {response.status_code}")
         if response.status_code == 200:
-            data = response.json()
-            print(f"✅ 健康检查成功: {json.dumps(data, indent=2, ensure_ascii=False)}")
+            data = parse_json(response)
+            log(f"✅ 健康检查成功: {format_json(data)}")
         else:
-            print(f"❌ 健康检查失败: {response.text}")
+            log(f"❌ 健康检查失败: {response.text}")
     except Exception as e:
-        print(f"❌ 健康检查异常: {e}")
+        log(f"❌ 健康检查异常: {e}")
 
 
 def test_conversation():
     """测试对话功能"""
-    print("\n💬 测试对话功能...")
+    log("\n💬 测试对话功能...")
     
     # 1. 开始对话
-    print("1️⃣ 开始对话...")
+    log("1️⃣ 开始对话...")
     try:
         start_payload = {
             "user_id": "test_user",
             "preferences": {}
         }
-        response = requests.post(
-            "http://localhost:8000/api/v1/conversation/start",
+        response = get_session().post(
+            f"{BASE_URL}/api/v1/conversation/start",
             json=start_payload
         )
-        print(f"开始对话状态码: {response.status_code}")
-        print(f"响应内容: {response.text}")
+        log(f"开始对话状态码: {response.status_code}")
+        log(f"响应内容: {response.text}")
         
         if response.status_code == 200:
-            data = response.json()
+            data = parse_json(response)
             session_id = data.get('session_id')
-            print(f"✅ 对话开始成功，会话ID: {session_id}")
+            log(f"✅ 对话开始成功，会话ID: {session_id}")
             
             # 2. 发送消息
-            print("\n2️⃣ 发送消息...")
+            log("\n2️⃣ 发送消息...")
             message_payload = {
                 "session_id": session_id,
                 "message": "我想找Python开发工程师的工作",
                 "job_count": 3
             }
             
-            response = requests.post(
-                "http://localhost:8000/api/v1/conversation/message",
+            response = get_session().post(
+                f"{BASE_URL}/api/v1/conversation/message",
                 json=message_payload
             )
-            print(f"发送消息状态码: {response.status_code}")
-            print(f"响应内容: {response.text}")
+            log(f"发送消息状态码: {response.status_code}")
+            log(f"响应内容: {response.text}")
             
             if response.status_code == 200:
-                data = response.json()
-                print(f"✅ 消息发送成功")
-                print(f"助手回复: {data.get('message', '')[:200]}...")
+                data = parse_json(response)
+                log(f"✅ 消息发送成功")
+                log(f"助手回复: {data.get('message', '')[:200]}...")
             else:
-                print(f"❌ 消息发送失败")
+                log(f"❌ 消息发送失败")
                 
         else:
-            print(f"❌ 对话开始失败")
+            log(f"❌ 对话开始失败")
             
     except Exception as e:
-        print(f"❌ 对话测试异常: {e}")
+        log(f"❌ 对话测试异常: {e}")
 
 
 def test_rag():
     """测试RAG功能"""
-    print("\n📚 测试RAG功能...")
-    
-    # 1. 测试RAG状态
-    print("1️⃣ 测试RAG状态...")
+    for test_func in RAG_TESTS:
+        test_func()
+
+
+def test_rag_status():
+    """测试RAG状态"""
+    log("\n📚 测试RAG功能...")
+    log("1️⃣ 测试RAG状态...")
     try:
-        response = requests.get("http://localhost:8000/api/v1/rag/status")
-        print(f"RAG状态码: {response.status_code}")
+        response = get_session().get(f"{BASE_URL}/api/v1/rag/status")
+        log(f"RAG状态码: {response.status_code}")
         if response.status_code == 200:
-            data = response.json()
-            print(f"✅ RAG状态正常")
-            print(f"初始化状态: {data.get('is_initialized')}")
-            print(f"文档统计: {data.get('document_stats', {})}")
+            data = parse_json(response)
+            log(f"✅ RAG状态正常")
+            log(f"初始化状态: {data.get('is_initialized')}")
+            log(f"文档统计: {data.get('document_stats', {})}")
         else:
-            print(f"❌ RAG状态异常: {response.text}")
+            log(f"❌ RAG状态异常: {response.text}")
     except Exception as e:
-        print(f"❌ RAG状态测试异常: {e}")
-    
-    # 2. 测试RAG查询
-    print("\n2️⃣ 测试RAG查询...")
+        log(f"❌ RAG状态测试异常: {e}")
+
+
+def test_rag_query():
+    """测试RAG查询"""
+    log("\n2️⃣ 测试RAG查询...")
     try:
         query_payload = {
             "question": "有哪些Python开发工程师的职位？",
             "k": 3,
             "use_streaming": False
         }
-        response = requests.post(
-            "http://localhost:8000/api/v1/rag/query",
+        response = get_session().post(
+            f"{BASE_URL}/api/v1/rag/query",
             json=query_payload
         )
-        print(f"RAG查询状态码: {response.status_code}")
+        log(f"RAG查询状态码: {response.status_code}")
         if response.status_code == 200:
-            data = response.json()
-            print(f"✅ RAG查询成功")
-            print(f"回答: {data.get('answer', '')[:200]}...")
-            print(f"相关文档数: {len(data.get('relevant_documents', []))}")
+            data = parse_json(response)
+            log(f"✅ RAG查询成功")
+            log(f"回答: {data.get('answer', '')[:200]}...")
+            log(f"相关文档数: {len(data.get('relevant_documents', []))}")
         else:
-            print(f"❌ RAG查询失败: {response.text}")
+            log(f"❌ RAG查询失败: {response.text}")
     except Exception as e:
-        print(f"❌ RAG查询异常: {e}")
-    
-    # 3. 测试职位搜索
-    print("\n3️⃣ 测试职位搜索...")
+        log(f"❌ RAG查询异常: {e}")
+
+
+def test_job_search():
+    """测试职位搜索"""
+    log("\n3️⃣ 测试职位搜索...")
     try:
         search_payload = {
             "job_type": "Python开发工程师",
@@ -127,48 +200,51 @@ def test_rag():
             "salary": "15-25K",
             "limit": 5
         }
-        response = requests.post(
-            "http://localhost:8000/api/v1/rag/search/jobs",
+        response = get_session().post(
+            f"{BASE_URL}/api/v1/rag/search/jobs",
             json=search_payload
         )
-        print(f"职位搜索状态码: {response.status_code}")
+        log(f"职位搜索状态码: {response.status_code}")
         if response.status_code == 200:
-            data = response.json()
-            print(f"✅ 职位搜索成功")
-            print(f"找到职位数: {data.get('total_count', 0)}")
+            data = parse_json(response)
+            log(f"✅ 职位搜索成功")
+            log(f"找到职位数: {data.get('total_count', 0)}")
             results = data.get('results', [])
             for i, job in enumerate(results[:3], 1):
-                print(f"  {i}. {job.get('job_title')} - {job.get('company_name')} - {job.get('salary')}")
+                log(f"  {i}. {job.get('job_title')} - {job.get('company_name')} - {job.get('salary')}")
         else:
-            print(f"❌ 职位搜索失败: {response.text}")
+            log(f"❌ 职位搜索失败: {response.text}")
     except Exception as e:
-        print(f"❌ 职位搜索异常: {e}")
+        log(f"❌ 职位搜索异常: {e}")
+
+
+RAG_TESTS = [test_rag_status, test_rag_query, test_job_search]
 
 
 def test_api_docs():
     """测试API文档"""
-    print("\n📖 测试API文档...")
+    log("\n📖 测试API文档...")
     try:
         # 测试OpenAPI文档
-        response = requests.get("http://localhost:8000/api/v1/openapi.json")
-        print(f"OpenAPI文档状态码: {response.status_code}")
+        response = get_session().get(f"{BASE_URL}/api/v1/openapi.json")
+        log(f"OpenAPI文档状态码: {response.status_code}")
         if response.status_code == 200:
-            print("✅ OpenAPI文档可访问")
+            log("✅ OpenAPI文档可访问")
         
         # 测试Swagger UI
-        response = requests.get("http://localhost:8000/docs")
-        print(f"Swagger UI状态码: {response.status_code}")
+        response = get_session().get(f"{BASE_URL}/docs")
+        log(f"Swagger UI状态码: {response.status_code}")
         if response.status_code == 200:
-            print("✅ Swagger UI可访问")
+            log("✅ Swagger UI可访问")
             
         # 测试ReDoc
-        response = requests.get("http://localhost:8000/redoc")
-        print(f"ReDoc状态码: {response.status_code}")
+        response = get_session().get(f"{BASE_URL}/redoc")
+        log(f"ReDoc状态码: {response.status_code}")
         if response.status_code == 200:
-            print("✅ ReDoc可访问")
+            log("✅ ReDoc可访问")
             
     except Exception as e:
-        print(f"❌ API文档测试异常: {e}")
+        log(f"❌ API文档测试异常: {e}")
 
 
 def main():
@@ -176,10 +252,9 @@ def main():
     print("🚀 开始详细的FastAPI测试")
     print("=" * 50)
     
-    test_health()
-    test_conversation()
-    test_rag()
-    test_api_docs()
+    # 各测试访问的接口相互独立，在同一个线程池中并发执行后按顺序输出
+    for output in run_concurrently([test_health, test_conversation, *RAG_TESTS, test_api_docs]):
+        print(output)
     
     print("\n" + "=" * 50)
     print("🎯 测试完成！")
@@ -6,15 +6,44 @@
 """
 
 import os
-import pandas as pd
-from typing import List, Iterator
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import List, Iterator, TYPE_CHECKING
 from langchain.schema import Document
-from langchain_community.document_loaders import (
-    TextLoader,
-    PyPDFLoader,
-    Docx2txtLoader,
-)
 from langchain_community.document_loaders.base import BaseLoader
+from document_types import is_supported_document
+from pickle_cache import cache_file_path, read_pickle_cache, write_pickle_cache
+
+# pandas 与各格式加载器（PDF/Word等）导入开销较大，在实际加载文件时才导入
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+@lru_cache(maxsize=1)
+def _excel_engine():
+    """选择Excel解析引擎：优先使用 calamine（Rust实现，需 pandas>=2.2），否则使用pandas默认引擎"""
+    if importlib.util.find_spec("python_calamine") is None:
+        return None
+    import pandas as pd
+    try:
+        major, minor = (int(part) for part in pd.__version__.split(".")[:2])
+    except ValueError:
+        return None
+    return "calamine" if (major, minor) >= (2, 2) else None
+
+
+# Document元数据键与Excel列名的对应关系
+_METADATA_FIELDS = (
+    ("job_title", '职位名称'),
+    ("company_name", '公司名称'),
+    ("location", '地区'),
+    ("salary", '薪资'),
+    ("experience", '工作经验'),
+    ("education", '学历'),
+)
 
 
 class ExcelJobDataLoader(BaseLoader):
@@ -39,79 +68,112 @@ class ExcelJobDataLoader(BaseLoader):
         return list(self.lazy_load())
 
     def lazy_load(self) -> Iterator[Document]:
-        """实现BaseLoader的lazy_load方法 - 支持懒加载"""
-        try:
-            excel_file = pd.ExcelFile(self.file_path)
-
-            # 确定要处理的工作表
-            sheet_names = [self.sheet_name] if self.sheet_name else excel_file.sheet_names
-
-            for sheet_name in sheet_names:
-                if sheet_name not in excel_file.sheet_names:
-                    continue
-
-                # 读取工作表
-                df = pd.read_excel(self.file_path, sheet_name=sheet_name)
-
-                # 跳过空的工作表
-                if df.empty:
-                    continue
-
-                # 获取列标题
-                headers = df.columns.tolist()
-
-                # 为每一行数据创建单独的Document
-                for index, row in df.iterrows():
-                    # 收集结构化字段
-                    structured_fields = {}
-                    for col in headers:
-                        cell_value = row[col]
-                        if pd.isna(cell_value):
-                            cell_value = ""
-                        else:
-                            cell_value = str(cell_value)
-                        structured_fields[col] = cell_value
-
-                    # 创建优化的文档内容
-                    job_content = self._create_structured_content(structured_fields, index + 1)
-
-                    # 添加搜索关键词
-                    job_content += self._create_search_keywords(structured_fields)
-
-                    # 创建Document对象
-                    doc = Document(
-                        page_content=job_content,
-                        metadata={
-                            "source": self.file_path,
-                            "sheet_name": sheet_name,
-                            "file_type": "excel",
-                            "row_index": index + 1,
-                            "total_rows": len(df),
-                            "total_columns": len(df.columns),
-                            "structured_fields": structured_fields,
-                            "job_title": structured_fields.get('职位名称', ''),
-                            "company_name": structured_fields.get('公司名称', ''),
-                            "location": structured_fields.get('地区', structured_fields.get('地 区', '')),
-                            "salary": structured_fields.get('薪资', ''),
-                            "experience": structured_fields.get('工作经验', ''),
-                            "education": structured_fields.get('学历', '')
-                        }
-                    )
-                    yield doc
-
-        except Exception as e:
-            print(f"加载Excel文件 {self.file_path} 时出错: {e}")
-            return
-
-    def _create_structured_content(self, structured_fields: dict, row_num: int) -> str:
+        """
+        实现BaseLoader的lazy_load方法 - 支持懒加载
+        读取出错时异常向调用方抛出（此前可能已产出部分工作表的文档），由调用方决定是否丢弃结果
+        """
+        import pandas as pd
+
+        with pd.ExcelFile(self.file_path, engine=_excel_engine()) as excel_file:
+            yield from self._load_sheets(excel_file)
+
+    def _load_sheets(self, excel_file: "pd.ExcelFile") -> Iterator[Document]:
+        """从已打开的工作簿中逐个读取工作表，避免每个工作表重新解析文件"""
+        # 确定要处理的工作表
+        available_sheets = set(excel_file.sheet_names)
+        sheet_names = [self.sheet_name] if self.sheet_name else excel_file.sheet_names
+
+        for sheet_name in sheet_names:
+            if sheet_name not in available_sheets:
+                continue
+
+            # 读取工作表（复用已打开的工作簿句柄）
+            df = excel_file.parse(sheet_name=sheet_name)
+
+            # 跳过空的工作表
+            if df.empty:
+                continue
+
+            # 获取列标题
+            headers = df.columns.tolist()
+
+            # 按列类型完成空值填充与字符串转换，按列取出为Python列表
+            columns = [_share_repeated_values(_column_to_strings(df[col])) for col in headers]
+
+            # 预先确定本工作表中存在的内容字段，并生成该表头结构专用的行内容构建函数
+            present_fields = _present_content_fields(headers)
+            build_row = _compile_row_builder(present_fields)
+
+            # 本工作表所有行共用的元数据，以及元数据字段对应的列名（地区列兼容“地 区”写法）
+            metadata_prefix = {
+                "source": self.file_path,
+                "sheet_name": sheet_name,
+                "file_type": "excel",
+                "total_rows": len(df),
+                "total_columns": len(df.columns),
+            }
+            location_field = '地区' if '地区' in headers else '地 区'
+            metadata_fields = tuple(
+                (key, location_field if field == '地区' else field)
+                for key, field in _METADATA_FIELDS
+            )
+
+            # 为每一行数据创建单独的Document
+            for row_number, row_values in enumerate(zip(*columns), start=1):
+                # 收集结构化字段
+                structured_fields = dict(zip(headers, row_values))
+
+                # 一次遍历创建优化的文档内容与搜索关键词
+                job_content = build_row(structured_fields, row_number)
+
+                # 在共用元数据的副本上补充本行字段
+                metadata = metadata_prefix.copy()
+                metadata["row_index"] = row_number
+                metadata["structured_fields"] = structured_fields
+                for key, field in metadata_fields:
+                    metadata[key] = structured_fields.get(field, '')
+
+                # 创建Document对象
+                doc = Document(page_content=job_content, metadata=metadata)
+                yield doc
+
+    def _create_structured_content(self, structured_fields: dict, row_num: int,
+                                   present_fields: tuple = None) -> str:
         """创建结构化的文档内容"""
-        return _create_structured_content(structured_fields, row_num)
+        return _create_structured_content(structured_fields, row_num, present_fields)
 
     def _create_search_keywords(self, structured_fields: dict) -> str:
         """创建搜索关键词"""
         return _create_search_keywords(structured_fields)
 
 
+def _column_to_strings(series: "pd.Series") -> List[str]:
+    """将一列转换为字符串列表，空值转换为空字符串"""
+    missing = series.isna()
+    if series.dtype.kind in "iufb":
+        # 数值/布尔列直接按原类型转换，无需先升级为object列
+        strings = series.astype(str)
+        if missing.any():
+            strings = strings.mask(missing, "")
+        return strings.tolist()
+    # 其他类型（文本、日期等）保持逐值 str() 的结果
+    return series.astype(object).where(~missing, "").astype(str).tolist()
+
+
+def _share_repeated_values(values: List[str]) -> List[str]:
+    """
+    低基数列（学历、工作经验、地区等）中相同的值共用同一个字符串对象
+    每行的 structured_fields 都引用这些字符串，可明显减少元数据内存占用
+    """
+    canonical = {}
+    for value in values:
+        canonical.setdefault(value, value)
+    if len(canonical) * 2 > len(values):
+        # 高基数列（如职位信息）几乎没有重复，保持原样
+        return values
+    return [canonical[value] for value in values]
+
+
 class DocumentLoaderFactory:
     """
     文档加载器工厂类 - 展示架构设计能力
@@ -133,7 +195,14 @@ class DocumentLoaderFactory:
 
         if file_extension in ['.xlsx', '.xls']:
             return ExcelJobDataLoader(file_path)
-        elif file_extension == '.pdf':
+
+        from langchain_community.document_loaders import (
+            TextLoader,
+            PyPDFLoader,
+            Docx2txtLoader,
+        )
+
+        if file_extension == '.pdf':
             return PyPDFLoader(file_path)
         elif file_extension == '.docx':
             return Docx2txtLoader(file_path)
@@ -146,6 +215,7 @@ class DocumentLoaderFactory:
     def load_document(file_path: str) -> List[Document]:
         """
         便捷方法：直接加载文档
+        文件修改时间和大小均未变化时直接返回缓存的解析结果
 
         Args:
             file_path: 文件路径
@@ -153,159 +223,390 @@ class DocumentLoaderFactory:
         Returns:
             List[Document]: 加载的文档列表
         """
+        stamp = _loader_cache_stamp(file_path)
+        cached = _read_loader_cache(file_path, stamp)
+        if cached is not None:
+            return cached
+
         loader = DocumentLoaderFactory.create_loader(file_path)
-        return loader.load()
+        # 加载出错时异常直接抛出，只有完整加载的结果才写入缓存
+        documents = loader.load()
+        _write_loader_cache(file_path, stamp, documents)
+        return documents
+
+
+# 解析结果缓存目录（位于本模块所在目录，不随工作目录变化），文件未变化时跳过重新解析
+_LOADER_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_loader_cache")
+# 解析结果格式版本，加载器输出的文档内容或元数据结构变化时递增，使旧缓存失效
+_LOADER_CACHE_VERSION = 1
+
+
+def _loader_cache_stamp(file_path: str) -> tuple:
+    """文件的 (修改时间, 大小)，在解析前获取，解析期间文件被修改时缓存不会被误用"""
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _loader_cache_path(file_path: str) -> str:
+    """根据文件路径生成缓存文件路径：每个文件只有一个缓存条目，文件修改后新结果直接覆盖旧条目"""
+    return cache_file_path(_LOADER_CACHE_DIR, os.path.abspath(file_path), _LOADER_CACHE_VERSION)
+
+
+def _read_loader_cache(file_path: str, stamp: tuple):
+    """读取解析结果缓存，缓存条目与文件当前的修改时间、大小不一致时视为未命中"""
+    entry = read_pickle_cache(_loader_cache_path(file_path))
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+    return None
+
+
+def _write_loader_cache(file_path: str, stamp: tuple, documents: List[Document]):
+    """写入解析结果缓存（连同解析前获取的文件修改时间与大小）"""
+    write_pickle_cache(_loader_cache_path(file_path), (stamp, documents))
 
 
 def load_excel_document(file_path: str) -> List[Document]:
     """
     兼容性函数 - 使用新的ExcelJobDataLoader
-    保持向后兼容性
+    保持向后兼容性：加载出错时打印信息并返回空列表
     """
     loader = ExcelJobDataLoader(file_path)
-    return loader.load()
+    try:
+        return loader.load()
+    except Exception as e:
+        print(f"加载Excel文件 {file_path} 时出错: {e}")
+        return []
 
 
-def _create_structured_content(structured_fields: dict, row_number: int) -> str:
-    """创建结构化的文档内容"""
-    content = f"【职位信息 #{row_number}】\n\n"
+# 结构化内容各分区的字段（按显示顺序）
+_CORE_FIELDS = ('职位名称', '公司名称', '公司全称', '地区', '薪资', '工作经验', '学历')
+_COMPANY_FIELDS = ('主营业务', '公司规模', '是否融资', '注册资金', '成立时间', '公司类型', '法定代表人', '经营状态')
+_JOB_FIELDS = ('职位信息', '职位类型', '实习时间', '公司福利')
+_LOCATION_FIELDS = ('经度', '纬度')
+_CONTENT_SECTIONS = (_CORE_FIELDS, _COMPANY_FIELDS, _JOB_FIELDS, _LOCATION_FIELDS)
 
-    # 核心信息优先显示
-    core_fields = ['职位名称', '公司名称', '公司全称', '地区', '薪资', '工作经验', '学历']
 
-    content += "=== 核心信息 ===\n"
+def _present_content_fields(headers) -> tuple:
+    """计算各分区中实际存在于表头的字段，每个工作表只需计算一次"""
+    header_set = set(headers)
+    return tuple(
+        tuple(field for field in section if field in header_set)
+        for section in _CONTENT_SECTIONS
+    )
+
+
+def _strip_fields(structured_fields: dict, present_fields: tuple = None) -> tuple:
+    """
+    取出各分区字段并去除首尾空白，每个字段只处理一次
+
+    Returns:
+        (分区字段表, {字段: 去空白后的值})
+    """
+    if present_fields is None:
+        sections = _CONTENT_SECTIONS
+        values = {field: structured_fields.get(field, '').strip()
+                  for section in sections for field in section}
+    else:
+        sections = present_fields
+        values = {field: structured_fields[field].strip()
+                  for section in sections for field in section}
+    return sections, values
+
+
+def _append_structured_content(parts: list, values: dict, sections: tuple, row_number: int):
+    """将结构化内容片段追加到 parts"""
+    core_fields, company_fields, job_fields, location_fields = sections
+
+    parts.append(f"【职位信息 #{row_number}】\n\n")
+    parts.append("=== 核心信息 ===\n")
+
+    # 核心信息优先显示
     for field in core_fields:
-        value = structured_fields.get(field, '').strip()
+        value = values[field]
         if value:
-            content += f"• {field}: {value}\n"
+            parts.append(f"• {field}: {value}\n")
 
     # 公司详情
-    company_fields = ['主营业务', '公司规模', '是否融资', '注册资金', '成立时间', '公司类型', '法定代表人', '经营状态']
-    company_info = []
-    for field in company_fields:
-        value = structured_fields.get(field, '').strip()
-        if value:
-            company_info.append(f"• {field}: {value}")
-
+    company_info = [f"• {field}: {values[field]}\n" for field in company_fields if values[field]]
     if company_info:
-        content += f"\n=== 公司详情 ===\n"
-        content += "\n".join(company_info) + "\n"
+        parts.append("\n=== 公司详情 ===\n")
+        parts.extend(company_info)
 
     # 职位详情
-    job_fields = ['职位信息', '职位类型', '实习时间', '公司福利']
     job_info = []
     for field in job_fields:
-        value = structured_fields.get(field, '').strip()
+        value = values[field]
         if value and value != '[空]':
             # 限制职位信息长度，避免过长
             if field == '职位信息' and len(value) > 200:
                 value = value[:200] + "..."
-            job_info.append(f"• {field}: {value}")
+            job_info.append(f"• {field}: {value}\n")
 
     if job_info:
-        content += f"\n=== 职位详情 ===\n"
-        content += "\n".join(job_info) + "\n"
+        parts.append("\n=== 职位详情 ===\n")
+        parts.extend(job_info)
 
     # 位置信息
-    location_fields = ['经度', '纬度']
-    location_info = []
-    for field in location_fields:
-        value = structured_fields.get(field, '').strip()
-        if value:
-            location_info.append(f"{field}: {value}")
-
+    location_info = [f"{field}: {values[field]}" for field in location_fields if values[field]]
     if location_info:
-        content += f"\n=== 位置信息 ===\n"
-        content += "• " + " | ".join(location_info) + "\n"
-
-    return content
+        parts.append("\n=== 位置信息 ===\n")
+        parts.append(f"• {' | '.join(location_info)}\n")
+
+
+# 搜索关键词：(字段, 关键词前缀, 附加描述)，公司名称与公司全称单独处理
+_KEYWORD_LINES = (
+    ('职位名称', '职位', ' 招聘 岗位'),
+    ('地区', '地区', ' 工作地点 办公地址'),
+    ('薪资', '薪资', ' 工资 待遇 薪酬'),
+    ('工作经验', '经验', ' 工作经验 经验要求'),
+    ('学历', '学历', ' 学历要求 教育背景'),
+    ('主营业务', '行业', ' 业务领域'),
+)
 
 
-def _create_search_keywords(structured_fields: dict) -> str:
-    """创建搜索关键词，增强检索效果"""
-    keywords = "\n=== 搜索关键词 ===\n"
+def _append_search_keywords(parts: list, values: dict):
+    """将搜索关键词片段追加到 parts（values 中缺失的字段视为空）"""
+    get = values.get
+    parts.append("\n=== 搜索关键词 ===\n")
 
     # 公司相关关键词
-    company_name = structured_fields.get('公司名称', '').strip()
-    company_full_name = structured_fields.get('公司全称', '').strip()
+    company_name = get('公司名称', '')
+    company_full_name = get('公司全称', '')
     if company_name:
-        keywords += f"公司: {company_name}"
         if company_full_name and company_full_name != company_name:
-            keywords += f" ({company_full_name})"
-        keywords += "\n"
+            parts.append(f"公司: {company_name} ({company_full_name})\n")
+        else:
+            parts.append(f"公司: {company_name}\n")
 
-    # 职位相关关键词
-    job_title = structured_fields.get('职位名称', '').strip()
-    if job_title:
-        keywords += f"职位: {job_title} 招聘 岗位\n"
+    # 职位、地区、薪资、经验、学历、行业关键词
+    for field, label, suffix in _KEYWORD_LINES:
+        value = get(field, '')
+        if value:
+            parts.append(f"{label}: {value}{suffix}\n")
 
-    # 地区关键词
-    location = structured_fields.get('地区', '').strip()
-    if location:
-        keywords += f"地区: {location} 工作地点 办公地址\n"
 
-    # 薪资关键词
-    salary = structured_fields.get('薪资', '').strip()
-    if salary:
-        keywords += f"薪资: {salary} 工资 待遇 薪酬\n"
+@lru_cache(maxsize=32)
+def _compile_row_builder(present_fields: tuple):
+    """
+    按工作表实际存在的字段生成专用的行内容构建函数，输出与 _create_structured_content + _create_search_keywords 一致
+    字段取值被展开为局部变量，缺失字段对应的代码在生成时直接省略，逐行执行时无循环与字典查找
 
-    # 经验关键词
-    experience = structured_fields.get('工作经验', '').strip()
-    if experience:
-        keywords += f"经验: {experience} 工作经验 经验要求\n"
+    Args:
+        present_fields: _present_content_fields 的结果（同一表头结构的工作表共用同一函数）
 
-    # 学历关键词
-    education = structured_fields.get('学历', '').strip()
-    if education:
-        keywords += f"学历: {education} 学历要求 教育背景\n"
+    Returns:
+        build(structured_fields, row_number) -> str
+    """
+    core_fields, company_fields, job_fields, location_fields = present_fields
+    names = {}
+    lines = ["def build(f, n):"]
+    for section in present_fields:
+        for field in section:
+            names[field] = f"v{len(names)}"
+            lines.append(f"    {names[field]} = f[{field!r}].strip()")
+
+    lines.append("    parts = [f'【职位信息 #{n}】\\n\\n', '=== 核心信息 ===\\n']")
+    lines.append("    append = parts.append")
+
+    # 核心信息
+    for field in core_fields:
+        var = names[field]
+        lines.append(f"    if {var}: append({f'• {field}: '!r} + {var} + '\\n')")
 
-    # 行业关键词
-    business = structured_fields.get('主营业务', '').strip()
-    if business:
-        keywords += f"行业: {business} 业务领域\n"
+    # 公司详情
+    if company_fields:
+        lines.append(f"    if {' or '.join(names[field] for field in company_fields)}:")
+        lines.append("        append('\\n=== 公司详情 ===\\n')")
+        for field in company_fields:
+            var = names[field]
+            lines.append(f"        if {var}: append({f'• {field}: '!r} + {var} + '\\n')")
 
-    return keywords
+    # 职位详情
+    if job_fields:
+        conditions = [f"({names[field]} and {names[field]} != '[空]')" for field in job_fields]
+        lines.append(f"    if {' or '.join(conditions)}:")
+        lines.append("        append('\\n=== 职位详情 ===\\n')")
+        for field in job_fields:
+            var = names[field]
+            lines.append(f"        if {var} and {var} != '[空]':")
+            if field == '职位信息':
+                lines.append(f"            if len({var}) > 200: {var} = {var}[:200] + '...'")
+            lines.append(f"            append({f'• {field}: '!r} + {var} + '\\n')")
 
+    # 位置信息
+    if location_fields:
+        items = ", ".join(f"({field + ': '!r} + {names[field]}) if {names[field]} else ''"
+                          for field in location_fields)
+        lines.append(f"    location = [item for item in ({items},) if item]")
+        lines.append("    if location:")
+        lines.append("        append('\\n=== 位置信息 ===\\n')")
+        lines.append("        append('• ' + ' | '.join(location) + '\\n')")
+
+    # 搜索关键词
+    lines.append("    append('\\n=== 搜索关键词 ===\\n')")
+    company_var = names.get('公司名称')
+    if company_var:
+        full_var = names.get('公司全称')
+        lines.append(f"    if {company_var}:")
+        if full_var:
+            lines.append(f"        if {full_var} and {full_var} != {company_var}:")
+            lines.append(f"            append('公司: ' + {company_var} + ' (' + {full_var} + ')\\n')")
+            lines.append("        else:")
+            lines.append(f"            append('公司: ' + {company_var} + '\\n')")
+        else:
+            lines.append(f"        append('公司: ' + {company_var} + '\\n')")
+    for field, label, suffix in _KEYWORD_LINES:
+        var = names.get(field)
+        if var:
+            lines.append(f"    if {var}: append({label + ': '!r} + {var} + {suffix + chr(10)!r})")
 
-def load_documents(files_dir: str) -> List[Document]:
+    lines.append("    return ''.join(parts)")
+
+    namespace = {}
+    exec(compile("\n".join(lines), "<row_builder>", "exec"), namespace)
+    return namespace["build"]
+
+
+def _create_structured_content(structured_fields: dict, row_number: int, present_fields: tuple = None) -> str:
+    """
+    创建结构化的文档内容
+
+    Args:
+        structured_fields: 行数据字段
+        row_number: 行号
+        present_fields: _present_content_fields 的结果，为None时按完整字段表查找
+    """
+    sections, values = _strip_fields(structured_fields, present_fields)
+    parts = []
+    _append_structured_content(parts, values, sections, row_number)
+    return "".join(parts)
+
+
+def _create_search_keywords(structured_fields: dict) -> str:
+    """创建搜索关键词，增强检索效果"""
+    _, values = _strip_fields(structured_fields)
+    parts = []
+    _append_search_keywords(parts, values)
+    return "".join(parts)
+
+
+def _scan_supported_files(files_dir: str) -> List[os.DirEntry]:
+    """
+    单次扫描目录，返回支持类型的文件条目
+    os.scandir 的 DirEntry 自带文件类型信息，无需对每个文件再调用 stat
+    """
+    with os.scandir(files_dir) as entries:
+        return [entry for entry in entries if is_supported_document(entry.name) and entry.is_file()]
+
+
+def load_documents(files_dir: str, max_workers: int = None) -> List[Document]:
     """
     从指定目录加载所有支持的文档
-    使用工厂模式，更优雅的架构设计
+    使用工厂模式，更优雅的架构设计；多个文件时使用进程池并行解析
+
+    Args:
+        files_dir: 文档目录
+        max_workers: 最大进程数，默认为CPU核数
     """
-    docs = []
     if not os.path.exists(files_dir):
+        return []
+
+    # 提交前先过滤不支持的文件类型，避免在进程间传递异常
+    return load_document_files([entry.path for entry in _scan_supported_files(files_dir)], max_workers)
+
+
+def load_document_files(file_paths: List[str], max_workers: int = None) -> List[Document]:
+    """
+    加载指定的文档文件，多个文件时使用进程池并行解析
+
+    Args:
+        file_paths: 文档文件路径列表
+        max_workers: 最大进程数，默认为CPU核数
+    """
+    docs = []
+    workers = min(len(file_paths), max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        for file_path in file_paths:
+            docs.extend(_load_file_safely(file_path))
         return docs
 
-    for filename in os.listdir(files_dir):
-        file_path = os.path.join(files_dir, filename)
-        if not os.path.isfile(file_path):
-            continue
+    try:
+        # 以 spawn 方式启动子进程：调用方（Streamlit、uvicorn）是多线程进程，
+        # fork 出的子进程可能卡在其他线程持有的锁上
+        spawn_context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=spawn_context) as executor:
+            for file_docs in executor.map(_load_file_safely, file_paths, chunksize=1):
+                docs.extend(file_docs)
+    except (OSError, BrokenProcessPool) as e:
+        # 进程池不可用时退回串行加载
+        print(f"并行加载文档失败，改为串行加载: {e}")
+        docs = []
+        for file_path in file_paths:
+            docs.extend(_load_file_safely(file_path))
 
+    return docs
+
+
+def iter_documents(files_dir: str) -> Iterator[Document]:
+    """
+    流式加载目录中所有支持的文档，逐个产出Document
+    与 load_documents 不同，不会一次性在内存中保存全部文档
+    """
+    if not os.path.exists(files_dir):
+        return
+
+    yield from iter_document_files([entry.path for entry in _scan_supported_files(files_dir)])
+
+
+def iter_document_files(file_paths: List[str]) -> Iterator[Document]:
+    """流式加载指定的文档文件，逐个产出Document"""
+    for file_path in file_paths:
+        filename = os.path.basename(file_path)
         try:
-            # 使用工厂模式创建加载器
-            docs.extend(DocumentLoaderFactory.load_document(file_path))
-        except ValueError as e:
-            # 不支持的文件类型，跳过
-            continue
+            stamp = _loader_cache_stamp(file_path)
+            cached = _read_loader_cache(file_path, stamp)
+            if cached is not None:
+                yield from cached
+                continue
+
+            # 边产出边收集本文件的文档，完整加载后写入缓存，供之后的重建直接复用
+            documents = []
+            for document in DocumentLoaderFactory.create_loader(file_path).lazy_load():
+                documents.append(document)
+                yield document
+            _write_loader_cache(file_path, stamp, documents)
         except Exception as e:
             print(f"加载文件 {filename} 时出错: {e}")
 
-    return docs
+
+def _load_file_safely(file_path: str) -> List[Document]:
+    """加载单个文件，出错时打印信息并返回空列表（可在子进程中执行）"""
+    try:
+        # 使用工厂模式创建加载器
+        return DocumentLoaderFactory.load_document(file_path)
+    except Exception as e:
+        print(f"加载文件 {os.path.basename(file_path)} 时出错: {e}")
+        return []
 
 
 def load_documents_legacy(files_dir: str) -> List[Document]:
     """
     传统的文档加载方式 - 保留作为对比
     """
+    from langchain_community.document_loaders import (
+        TextLoader,
+        PyPDFLoader,
+        Docx2txtLoader,
+    )
+
     docs = []
     if not os.path.exists(files_dir):
         return docs
 
-    for filename in os.listdir(files_dir):
-        file_path = os.path.join(files_dir, filename)
-        if not os.path.isfile(file_path):
-            continue
+    with os.scandir(files_dir) as entries:
+        files = [(entry.name, entry.path) for entry in entries if entry.is_file()]
 
+    for filename, file_path in files:
         try:
             if filename.endswith(".pdf"):
                 loader = PyPDFLoader(file_path)
@@ -327,11 +628,23 @@ def load_documents_legacy(files_dir: str) -> List[Document]:
 
 def split_documents(documents) -> List[Document]:
     """将文档分割成较小的文本块"""
+    return _get_text_splitter().split_documents(list(documents))
+
+
+@lru_cache(maxsize=1)
+def _get_text_splitter():
+    """获取共用的文本分割器（配置固定，只创建一次）"""
     from langchain.text_splitter import RecursiveCharacterTextSplitter
-    
-    text_splitter = RecursiveCharacterTextSplitter(
+
+    return RecursiveCharacterTextSplitter(
         chunk_size=500,
         chunk_overlap=50,
         length_function=len,
     )
-    return text_splitter.split_documents(documents)
+
+
+def iter_split_documents(documents) -> Iterator[Document]:
+    """流式分割文档：逐个文档分割并产出文本块，可接收任意可迭代对象"""
+    text_splitter = _get_text_splitter()
+    for document in documents:
+        yield from text_splitter.split_documents([document])
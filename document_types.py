@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档类型模块
+文档加载器与向量存储变更检测共用的文件类型判断，不依赖 langchain 等重量级库
+"""
+
+# 支持的文档扩展名（小写）
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.pdf', '.docx', '.txt')
+
+
+def is_supported_document(filename: str) -> bool:
+    """按扩展名判断是否为支持的文档类型（不区分大小写）"""
+    return filename.lower().endswith(SUPPORTED_EXTENSIONS)
@@ -5,14 +5,34 @@
 集成对话工作流和RAG检索功能，提供完整的求职服务
 """
 
+from functools import cached_property, wraps
 from typing import Dict, List, Optional, Any
 from conversation_workflow import ConversationWorkflowEngine
-from rag_core import load_existing_rag_system
-from incremental_vector_store import IncrementalVectorStore
-from hybrid_retrieval_system import HybridRetrievalSystem
 import json
 import time
 
+# rag_core / incremental_vector_store / hybrid_retrieval_system 会连带导入
+# langchain、FAISS、pandas 等重量级依赖，推迟到初始化系统时再导入
+
+
+def _ttl_cache(seconds: float):
+    """
+    实例方法结果的短时缓存（仅适用于无参数方法）
+    结果保存在实例的 _ttl_results 中，可通过 _invalidate_caches 清空
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self):
+            now = time.monotonic()
+            cached = self._ttl_results.get(method.__name__)
+            if cached is not None and now - cached[0] < seconds:
+                return cached[1]
+            result = method(self)
+            self._ttl_results[method.__name__] = (now, result)
+            return result
+        return wrapper
+    return decorator
+
 
 class HumanizedJobAssistant:
     """人性化求职助手主类"""
@@ -23,13 +43,22 @@ class HumanizedJobAssistant:
         self.workflow_engine = ConversationWorkflowEngine()
         self.rag_system = None
         self.hybrid_retrieval = None
-        self.vector_manager = IncrementalVectorStore(vector_store_path)
         self.is_initialized = False
+        self._ttl_results = {}
+        self._state_snapshot = None
+
+    @cached_property
+    def vector_manager(self):
+        """向量存储管理器（首次使用时创建）"""
+        from incremental_vector_store import IncrementalVectorStore
+        return IncrementalVectorStore(self.vector_store_path)
         
     def initialize(self) -> Dict[str, Any]:
         """初始化系统"""
         try:
             print("🔄 正在初始化人性化求职助手...")
+            from rag_core import load_existing_rag_system
+            from hybrid_retrieval_system import HybridRetrievalSystem
             
             # 1. 智能管理向量存储
             print("📊 检查向量存储状态...")
@@ -41,12 +70,13 @@ class HumanizedJobAssistant:
                     "details": "无法创建或更新向量存储"
                 }
             
-            # 2. 加载RAG系统
+            # 2. 加载RAG系统：复用向量存储管理器已加载的向量存储及其嵌入模型
             print("🤖 加载RAG系统...")
             self.rag_system = load_existing_rag_system(
                 vector_store_path=self.vector_store_path,
                 system_prompt="你是一个专业的求职顾问，专门帮助分析职位信息。",
-                use_streaming=False
+                use_streaming=False,
+                vector_store=self.vector_manager.get_vector_store()
             )
 
             # 3. 初始化混合检索系统
@@ -58,7 +88,8 @@ class HumanizedJobAssistant:
             )
             self.hybrid_retrieval.rag_system = self.rag_system  # 复用已加载的RAG系统
 
-            # 4. 获取系统统计信息
+            # 4. 获取系统统计信息（向量存储可能已更新，先清空缓存）
+            self._invalidate_caches()
             stats = self._get_system_stats()
             
             self.is_initialized = True
@@ -78,6 +109,19 @@ class HumanizedJobAssistant:
                 "details": "系统初始化过程中出现错误"
             }
     
+    def new_session(self) -> "HumanizedJobAssistant":
+        """
+        基于当前实例创建新的会话实例
+        共享已加载的向量存储与检索系统，对话工作流与缓存各自独立
+        """
+        session = HumanizedJobAssistant(self.vector_store_path, self.documents_dir)
+        session.rag_system = self.rag_system
+        session.hybrid_retrieval = self.hybrid_retrieval
+        if 'vector_manager' in self.__dict__:
+            session.vector_manager = self.vector_manager
+        session.is_initialized = self.is_initialized
+        return session
+    
     def start_conversation(self) -> Dict[str, Any]:
         """开始新的对话"""
         if not self.is_initialized:
@@ -88,6 +132,7 @@ class HumanizedJobAssistant:
             }
         
         greeting = self.workflow_engine.start_conversation()
+        self._state_snapshot = None
         
         return {
             "success": True,
@@ -115,7 +160,8 @@ class HumanizedJobAssistant:
             }
         
         try:
-            # 处理用户输入
+            # 处理用户输入（对话状态随之变化，作废状态快照）
+            self._state_snapshot = None
             workflow_result = self.workflow_engine.process_user_input(user_message)
             
             # 检查是否准备好搜索
@@ -258,34 +304,22 @@ class HumanizedJobAssistant:
         if not search_results:
             return {}
         
-        companies = set()
-        locations = set()
-        salary_ranges = []
-        job_types = set()
-        
-        for doc in search_results:
-            metadata = doc.metadata
-            structured_fields = metadata.get('structured_fields', {})
-            
-            # 统计公司
-            company = metadata.get('company_name', '')
-            if company:
-                companies.add(company)
-            
-            # 统计地点
-            location = metadata.get('location', '')
-            if location:
-                locations.add(location)
-            
-            # 统计薪资
-            salary = metadata.get('salary', '')
-            if salary:
-                salary_ranges.append(salary)
-            
-            # 统计职位类型
-            job_type = structured_fields.get('职位类型', '')
-            if job_type:
-                job_types.add(job_type)
+        # 单次遍历把元数据拆成并列的字段序列，再分别过滤空值
+        metadatas = [doc.metadata for doc in search_results]
+        companies, locations, salaries, job_types = zip(*(
+            (
+                metadata.get('company_name', ''),
+                metadata.get('location', ''),
+                metadata.get('salary', ''),
+                metadata.get('structured_fields', {}).get('职位类型', ''),
+            )
+            for metadata in metadatas
+        ))
+
+        companies = set(filter(None, companies))
+        locations = set(filter(None, locations))
+        salary_ranges = list(filter(None, salaries))
+        job_types = set(filter(None, job_types))
         
         return {
             "total_positions": len(search_results),
@@ -308,17 +342,29 @@ class HumanizedJobAssistant:
     def restart_conversation(self) -> Dict[str, Any]:
         """重新开始对话"""
         self.workflow_engine.reset_conversation()
+        self._invalidate_caches()
         return self.start_conversation()
     
     def get_conversation_history(self) -> List[Dict[str, str]]:
         """获取对话历史"""
-        return self.workflow_engine.get_conversation_state().get("conversation_history", [])
+        return self._get_state_snapshot().get("conversation_history", [])
     
     def get_current_requirements(self) -> Dict[str, Any]:
         """获取当前收集的需求信息"""
-        state = self.workflow_engine.get_conversation_state()
-        return state.get("requirements", {})
+        return self._get_state_snapshot().get("requirements", {})
+    
+    def _get_state_snapshot(self) -> Dict[str, Any]:
+        """获取对话状态快照，对话状态变化（处理消息、重新开始）后才重新生成"""
+        if self._state_snapshot is None:
+            self._state_snapshot = self.workflow_engine.get_conversation_state()
+        return self._state_snapshot
+    
+    def _invalidate_caches(self):
+        """清空对话状态快照与统计信息缓存"""
+        self._state_snapshot = None
+        self._ttl_results.clear()
     
+    @_ttl_cache(seconds=2)
     def _get_system_stats(self) -> Dict[str, Any]:
         """获取系统统计信息"""
         try:
@@ -6,11 +6,69 @@
 """
 
 import streamlit as st
+import pandas as pd
 import time
+import hashlib
 from typing import Dict, List, Any
 from humanized_job_assistant import create_humanized_job_assistant
 import json
 
+# Streamlit 片段装饰器（>=1.37 为 st.fragment，1.33~1.36 为 st.experimental_fragment），不可用时按普通函数执行
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# 各阶段的输入提示
+INPUT_PLACEHOLDERS = {
+    "greeting": "请输入您的回答...",
+    "job_type": "例如：Python开发工程师、UI设计师、产品经理...",
+    "location": "例如：深圳、北京、上海、远程办公...",
+    "salary": "例如：15-20K、月薪1万、年薪30万...",
+    "search_completed": "搜索已完成"
+}
+
+# 各阶段的输入建议
+INPUT_SUGGESTIONS = {
+    "job_type": {
+        "title": "💡 职位类型建议",
+        "items": ["Python开发工程师", "Java开发工程师", "前端开发工程师", "UI设计师", "产品经理", "数据分析师"]
+    },
+    "location": {
+        "title": "📍 地点建议",
+        "items": ["深圳", "北京", "上海", "广州", "杭州", "远程办公"]
+    },
+    "salary": {
+        "title": "💰 薪资格式建议",
+        "items": ["15-20K", "月薪15000", "年薪30万", "20K以上", "面议"]
+    }
+}
+
+# 进度阶段指示器
+PROGRESS_STAGES = ["问候", "职位类型", "工作地点", "薪资期望", "搜索中"]
+PROGRESS_STAGE_INDEX = {
+    "greeting": 0,
+    "job_type": 1,
+    "location": 2,
+    "salary": 3,
+    "search_completed": 4
+}
+
+# 侧边栏使用提示
+USAGE_TIPS = """
+        **智能对话特点：**
+        - 🤖 **AI理解**：系统能智能理解您的自然语言输入
+        - 🎯 **精准匹配**：混合检索技术确保薪资精确匹配
+        - 💬 **友好引导**：遇到不清楚的输入会耐心引导
+
+        **输入示例：**
+        - 职位：python、前端、设计师、产品经理
+        - 地点：深圳、北上广、远程办公
+        - 薪资：15K、15-20K、月薪1万、年薪30万
+
+        **AI会自动：**
+        - ✅ 理解简化输入（如"python"→"Python开发工程师"）
+        - ✅ 补全缺失信息（如"15-20"→"15-20K"）
+        - ✅ 识别无效输入并友好提示
+        """
+
 
 def initialize_session_state():
     """初始化会话状态"""
@@ -51,22 +109,47 @@ def initialize_session_state():
     if 'show_ai_debug' not in st.session_state:
         st.session_state.show_ai_debug = False  # 是否显示AI调试信息
 
+    if 'is_streaming' not in st.session_state:
+        st.session_state.is_streaming = False  # 本轮是否正在处理新输入（处理完成后会整页刷新）
+
+    if 'ai_stats' not in st.session_state:
+        reset_ai_stats()  # AI处理统计：处理条数、已理解条数与置信度累计值
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_assistant():
+    """
+    创建并初始化共享的求职助手（同一服务进程内只初始化一次，刷新页面不会重新加载向量存储）
+
+    Returns:
+        (已初始化的助手, 初始化结果)
+    """
+    assistant = create_humanized_job_assistant()
+    init_result = assistant.initialize()
+    return assistant, init_result
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_vector_store_stats() -> Dict[str, Any]:
+    """获取向量存储统计信息（缓存60秒）"""
+    assistant, _ = get_shared_assistant()
+    return assistant._get_system_stats().get("vector_store", {})
+
 
 def initialize_system():
     """初始化求职助手系统"""
     if not st.session_state.system_initialized:
         with st.spinner("🔄 正在初始化人性化求职助手..."):
-            assistant = create_humanized_job_assistant()
-            init_result = assistant.initialize()
+            shared_assistant, init_result = get_shared_assistant()
             
             if init_result["success"]:
-                st.session_state.assistant = assistant
+                # 每个会话使用独立的对话流程，共享已加载的检索资源
+                st.session_state.assistant = shared_assistant.new_session()
                 st.session_state.system_initialized = True
                 
                 # 显示系统统计信息
                 if "stats" in init_result:
-                    stats = init_result["stats"]
-                    vector_stats = stats.get("vector_store", {})
+                    vector_stats = get_vector_store_stats()
                     
                     col1, col2, col3 = st.columns(3)
                     with col1:
@@ -82,6 +165,8 @@ def initialize_system():
                 st.success("✅ 系统初始化成功！")
                 return True
             else:
+                # 不缓存失败的初始化结果，下次重试
+                get_shared_assistant.clear()
                 st.error(f"❌ 系统初始化失败: {init_result.get('error', '未知错误')}")
                 return False
     return True
@@ -105,35 +190,13 @@ def start_conversation():
 
 def get_smart_input_placeholder(current_stage: str) -> str:
     """根据当前阶段获取智能输入提示"""
-    placeholders = {
-        "greeting": "请输入您的回答...",
-        "job_type": "例如：Python开发工程师、UI设计师、产品经理...",
-        "location": "例如：深圳、北京、上海、远程办公...",
-        "salary": "例如：15-20K、月薪1万、年薪30万...",
-        "search_completed": "搜索已完成"
-    }
-    return placeholders.get(current_stage, "请输入您的回答...")
+    return INPUT_PLACEHOLDERS.get(current_stage, "请输入您的回答...")
 
 
 def display_input_suggestions(current_stage: str):
     """显示输入建议"""
-    suggestions = {
-        "job_type": {
-            "title": "💡 职位类型建议",
-            "items": ["Python开发工程师", "Java开发工程师", "前端开发工程师", "UI设计师", "产品经理", "数据分析师"]
-        },
-        "location": {
-            "title": "📍 地点建议",
-            "items": ["深圳", "北京", "上海", "广州", "杭州", "远程办公"]
-        },
-        "salary": {
-            "title": "💰 薪资格式建议",
-            "items": ["15-20K", "月薪15000", "年薪30万", "20K以上", "面议"]
-        }
-    }
-
-    if current_stage in suggestions:
-        suggestion = suggestions[current_stage]
+    suggestion = INPUT_SUGGESTIONS.get(current_stage)
+    if suggestion:
         with st.expander(suggestion["title"], expanded=False):
             cols = st.columns(3)
             for i, item in enumerate(suggestion["items"]):
@@ -145,116 +208,166 @@ def display_input_suggestions(current_stage: str):
 
 def display_chat_interface():
     """显示聊天界面"""
+    # 先读取输入框：st.chat_input 始终固定在页面底部，调用顺序不影响显示位置
+    user_input = None
+    if not st.session_state.search_completed:
+        # 根据当前阶段提供智能输入提示
+        input_placeholder = get_smart_input_placeholder(st.session_state.current_stage)
+        user_input = st.chat_input(input_placeholder)
+
+    # 本轮需要处理新输入时，处理完成后会整页刷新，此前的渲染只走轻量路径
+    st.session_state.is_streaming = bool(user_input)
+
     # 聊天消息容器
     chat_container = st.container()
     
     with chat_container:
-        # 显示对话历史
-        for i, message in enumerate(st.session_state.messages):
+        render_chat_history()
+    
+    # 用户输入区域
+    if not st.session_state.search_completed:
+        handle_user_input(chat_container, user_input)
+
+
+@fragment
+def render_chat_history():
+    """
+    显示对话历史
+    作为独立片段渲染：历史消息中的控件（职位卡片按钮、标签页等）交互时只重新执行本片段，
+    而不是整个页面脚本
+    """
+    if st.session_state.is_streaming:
+        # 处理新输入期间只显示消息文本，跳过调试详情、职位卡片与地图
+        for message in st.session_state.messages:
             with st.chat_message(message["role"]):
                 st.markdown(message["content"])
+        return
 
-                # 显示AI处理信息（如果启用调试模式）
-                if (message["role"] == "assistant" and
-                    st.session_state.show_ai_debug and
-                    i < len(st.session_state.ai_processing_info)):
-
-                    ai_info = st.session_state.ai_processing_info[i]
-                    if ai_info:
-                        with st.expander("🔍 AI处理详情", expanded=False):
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.metric("理解程度", "✅ 已理解" if ai_info.get('understood') else "❌ 未理解")
-                                st.metric("置信度", f"{ai_info.get('confidence', 0):.1%}")
-                            with col2:
-                                extracted = ai_info.get('extracted_info', {})
-                                if extracted:
-                                    st.write("**提取信息:**")
-                                    for key, value in extracted.items():
-                                        st.write(f"- {key}: {value}")
-                                else:
-                                    st.write("**提取信息:** 无")
+    messages = st.session_state.messages
+
+    # 调试开关在循环外判断一次，常用的非调试路径不再逐条检查
+    if st.session_state.show_ai_debug:
+        ai_processing_info = st.session_state.ai_processing_info
+        ai_info_len = len(ai_processing_info)
+        for i, message in enumerate(messages):
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"])
+
+                # 显示AI处理信息
+                if message["role"] == "assistant" and i < ai_info_len:
+                    display_ai_debug_info(ai_processing_info[i])
 
                 # 如果是搜索结果消息，显示职位卡片
                 if message.get("search_results"):
-                    display_job_results(message["search_results"])
-    
-    # 用户输入区域
-    if not st.session_state.search_completed:
-        # 根据当前阶段提供智能输入提示
-        input_placeholder = get_smart_input_placeholder(st.session_state.current_stage)
-        user_input = st.chat_input(input_placeholder)
+                    display_job_results(message["search_results"], key=f"active_job_{i}")
+    else:
+        for i, message in enumerate(messages):
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"])
+                if message.get("search_results"):
+                    display_job_results(message["search_results"], key=f"active_job_{i}")
 
-        # 显示输入建议
-        if st.session_state.current_stage != "greeting":
-            display_input_suggestions(st.session_state.current_stage)
 
-        if user_input:
-            # 添加用户消息
-            st.session_state.messages.append({
-                "role": "user",
-                "content": user_input,
-                "timestamp": time.time()
-            })
-            
-            # 处理用户输入
+def display_ai_debug_info(ai_info: Dict[str, Any]):
+    """显示单条消息的AI处理详情"""
+    if not ai_info:
+        return
+
+    with st.expander("🔍 AI处理详情", expanded=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("理解程度", "✅ 已理解" if ai_info.get('understood') else "❌ 未理解")
+            st.metric("置信度", f"{ai_info.get('confidence', 0):.1%}")
+        with col2:
+            extracted = ai_info.get('extracted_info', {})
+            if extracted:
+                st.write("**提取信息:**")
+                for key, value in extracted.items():
+                    st.write(f"- {key}: {value}")
+            else:
+                st.write("**提取信息:** 无")
+
+
+def handle_user_input(chat_container, user_input):
+    """处理用户输入区域：输入建议以及新消息的处理"""
+    # 显示输入建议（正在处理新输入时跳过，处理完成后页面会刷新）
+    if not user_input and st.session_state.current_stage != "greeting":
+        display_input_suggestions(st.session_state.current_stage)
+
+    if user_input:
+        # 添加用户消息，并直接在当前页面追加显示，无需等待整页刷新
+        st.session_state.messages.append({
+            "role": "user",
+            "content": user_input,
+            "timestamp": time.time()
+        })
+        with chat_container:
+            with st.chat_message("user"):
+                st.markdown(user_input)
+
+        # 处理用户输入
+        try:
             with st.spinner("🤔 正在智能分析您的输入..."):
                 result = st.session_state.assistant.process_message(user_input, st.session_state.job_count)
+        finally:
+            st.session_state.is_streaming = False
+
+        if result["success"]:
+            # 保存AI处理信息（用于调试显示）
+            ai_info = {
+                "user_input": user_input,
+                "understood": result.get("extracted_info", {}) != {},
+                "confidence": result.get("confidence", 0.0),
+                "extracted_info": result.get("extracted_info", {}),
+                "stage": result.get("stage", st.session_state.current_stage),
+                "timestamp": time.time()
+            }
+            st.session_state.ai_processing_info.append(ai_info)
+            record_ai_stats(ai_info["understood"], ai_info["confidence"])
 
-            if result["success"]:
-                # 保存AI处理信息（用于调试显示）
-                ai_info = {
-                    "user_input": user_input,
-                    "understood": result.get("extracted_info", {}) != {},
-                    "confidence": result.get("confidence", 0.0),
-                    "extracted_info": result.get("extracted_info", {}),
-                    "stage": result.get("stage", st.session_state.current_stage),
-                    "timestamp": time.time()
-                }
-                st.session_state.ai_processing_info.append(ai_info)
-
-                # 添加助手回复
-                assistant_message = {
-                    "role": "assistant",
-                    "content": result["message"],
-                    "timestamp": time.time()
-                }
-
-                # 如果有搜索结果，添加到消息中
-                if "search_results" in result:
-                    assistant_message["search_results"] = result["search_results"]
-                    assistant_message["search_summary"] = result.get("search_summary", {})
-                    st.session_state.search_results = result["search_results"]
-                    st.session_state.search_completed = True
-
-                st.session_state.messages.append(assistant_message)
-
-                # 更新状态
-                st.session_state.current_stage = result.get("stage", st.session_state.current_stage)
-                st.session_state.progress = result.get("progress", st.session_state.progress)
-
-                # 显示AI处理反馈
-                if ai_info["understood"] and ai_info["extracted_info"]:
-                    extracted = ai_info["extracted_info"]
-                    feedback_parts = []
-                    for key, value in extracted.items():
-                        if key == "job_type":
-                            feedback_parts.append(f"职位类型: {value}")
-                        elif key == "location":
-                            feedback_parts.append(f"工作地点: {value}")
-                        elif key == "salary":
-                            feedback_parts.append(f"薪资期望: {value}")
-
-                    if feedback_parts:
-                        st.success(f"✅ AI智能识别: {', '.join(feedback_parts)} (置信度: {ai_info['confidence']:.1%})")
-                elif not ai_info["understood"]:
-                    st.info("💡 AI正在引导您提供更准确的信息")
-                
-            else:
-                st.error(f"❌ 处理消息失败: {result.get('error', '未知错误')}")
+            # 添加助手回复
+            assistant_message = {
+                "role": "assistant",
+                "content": result["message"],
+                "timestamp": time.time()
+            }
+
+            # 如果有搜索结果，添加到消息中
+            if "search_results" in result:
+                prepare_job_results(result["search_results"])
+                assistant_message["search_results"] = result["search_results"]
+                assistant_message["search_summary"] = result.get("search_summary", {})
+                st.session_state.search_results = result["search_results"]
+                st.session_state.search_completed = True
+
+            st.session_state.messages.append(assistant_message)
+
+            # 更新状态
+            st.session_state.current_stage = result.get("stage", st.session_state.current_stage)
+            st.session_state.progress = result.get("progress", st.session_state.progress)
+
+            # 显示AI处理反馈
+            if ai_info["understood"] and ai_info["extracted_info"]:
+                extracted = ai_info["extracted_info"]
+                feedback_parts = []
+                for key, value in extracted.items():
+                    if key == "job_type":
+                        feedback_parts.append(f"职位类型: {value}")
+                    elif key == "location":
+                        feedback_parts.append(f"工作地点: {value}")
+                    elif key == "salary":
+                        feedback_parts.append(f"薪资期望: {value}")
+
+                if feedback_parts:
+                    st.success(f"✅ AI智能识别: {', '.join(feedback_parts)} (置信度: {ai_info['confidence']:.1%})")
+            elif not ai_info["understood"]:
+                st.info("💡 AI正在引导您提供更准确的信息")
             
-            # 刷新页面显示新消息
+            # 本轮处理结束，刷新页面以同步进度与侧边栏
             st.rerun()
+        else:
+            # 对话状态未变化，无需刷新整页，错误信息保留在当前页面
+            st.error(f"❌ 处理消息失败: {result.get('error', '未知错误')}")
 
 
 def display_progress_bar():
@@ -275,19 +388,10 @@ def display_progress_bar():
         st.caption(f"{percentage:.0f}%")
     
     # 阶段指示器
-    stages = ["问候", "职位类型", "工作地点", "薪资期望", "搜索中"]
-    stage_map = {
-        "greeting": 0,
-        "job_type": 1,
-        "location": 2,
-        "salary": 3,
-        "search_completed": 4
-    }
-    
-    current_stage_index = stage_map.get(st.session_state.current_stage, 0)
+    current_stage_index = PROGRESS_STAGE_INDEX.get(st.session_state.current_stage, 0)
     
-    cols = st.columns(len(stages))
-    for i, (col, stage) in enumerate(zip(cols, stages)):
+    cols = st.columns(len(PROGRESS_STAGES))
+    for i, (col, stage) in enumerate(zip(cols, PROGRESS_STAGES)):
         with col:
             if i < current_stage_index:
                 st.success(f"✅ {stage}")
@@ -297,8 +401,14 @@ def display_progress_bar():
                 st.caption(f"⏳ {stage}")
 
 
-def display_job_results(search_results: List[Dict[str, Any]]):
-    """显示职位搜索结果"""
+def display_job_results(search_results: List[Dict[str, Any]], key: str = "active_job"):
+    """
+    显示职位搜索结果
+
+    Args:
+        search_results: 职位列表
+        key: 职位选择控件的key（同一页面多组结果时需不同）
+    """
     if not search_results:
         return
 
@@ -311,31 +421,111 @@ def display_job_results(search_results: List[Dict[str, Any]]):
     # 显示搜索方法
     st.caption("🔬 使用混合检索技术：向量语义匹配 + 薪资精确过滤")
 
-    # 创建标签页显示职位
-    tabs = st.tabs([f"职位 {i+1}" for i in range(len(search_results))])
+    # 一次性构建所有职位的坐标表，各职位只取自己的一行
+    locations = build_job_locations(tuple(parse_job_coordinates(job) for job in search_results))
+
+    # 以标签样式的单选切换职位，只渲染当前选中的职位（st.tabs 会渲染全部标签页内容）
+    active_index = st.radio(
+        "职位",
+        range(len(search_results)),
+        format_func=lambda index: f"职位 {index + 1}",
+        horizontal=True,
+        label_visibility="collapsed",
+        key=key,
+    )
+    if active_index is None or active_index >= len(search_results):
+        active_index = 0
+
+    display_single_job(search_results[active_index], active_index + 1, locations.iloc[[active_index]], scope=key)
+
+
+def prepare_job_results(search_results: List[Dict[str, Any]]):
+    """
+    搜索完成后一次性预处理职位：生成稳定的控件key，预先格式化核心信息
+    避免每次页面刷新时重复计算，结果重新排序后控件也能保持原有状态
+    """
+    for job in search_results:
+        job['_key'] = hashlib.blake2b(
+            f"{job.get('company_name', '')}|{job.get('job_title', '')}".encode('utf-8'),
+            digest_size=8
+        ).hexdigest()
+        job['_display'] = {
+            'salary': table_cell(job.get('salary', '面议')),
+            'location': table_cell(job.get('location', '未知')),
+            'education': table_cell(job.get('education', '未知')),
+            'experience': table_cell(job.get('experience', '未知')),
+        }
 
-    for i, (tab, job) in enumerate(zip(tabs, search_results)):
-        with tab:
-            display_single_job(job, i+1)
 
+def table_cell(value: Any) -> str:
+    """将原始值转换为Markdown表格单元格文本：转义竖线，换行合并为空格，避免破坏表格行"""
+    return " ".join(str(value).split()).replace("|", "\\|")
 
-def display_single_job(job: Dict[str, Any], rank: int):
-    """显示单个职位详情"""
-    # 职位标题
-    st.markdown(f"### 🏢 {job['company_name']}")
-    st.markdown(f"#### 💼 {job['job_title']}")
 
-    # 核心信息卡片
-    col1, col2, col3, col4 = st.columns(4)
+def parse_job_coordinates(job: Dict[str, Any]) -> tuple:
+    """解析职位的 (纬度, 经度)，缺失或无法解析时为 (None, None)"""
+    try:
+        return float(job['latitude']), float(job['longitude'])
+    except (KeyError, TypeError, ValueError):
+        return None, None
+
+
+@st.cache_data(show_spinner=False)
+def build_job_locations(coordinates: tuple) -> pd.DataFrame:
+    """将所有职位坐标构建为一个DataFrame（列为 lat/lon，无效坐标为NaN）"""
+    return pd.DataFrame.from_records(coordinates, columns=['lat', 'lon'], coerce_float=True)
+
+
+def format_job_summary(job: Dict[str, Any]) -> str:
+    """构建职位标题与核心信息（薪资/地点/学历/经验）的Markdown"""
+    display = job['_display']
+    return (
+        f"### 🏢 {job['company_name']}\n"
+        f"#### 💼 {job['job_title']}\n\n"
+        "| 💰 薪资 | 📍 地点 | 🎓 学历 | ⏰ 经验 |\n"
+        "|---|---|---|---|\n"
+        f"| {display['salary']} | {display['location']} "
+        f"| {display['education']} | {display['experience']} |\n"
+    )
 
-    with col1:
-        st.metric("💰 薪资", job.get('salary', '面议'))
-    with col2:
-        st.metric("📍 地点", job.get('location', '未知'))
-    with col3:
-        st.metric("🎓 学历", job.get('education', '未知'))
-    with col4:
-        st.metric("⏰经验", job.get('experience', '未知'))
+
+def format_company_info(job: Dict[str, Any]) -> str:
+    """构建公司信息与福利待遇的Markdown"""
+    lines = [
+        "#### 🏢 公司信息",
+        f"- **公司全称**: {job.get('company_full_name', '未知')}",
+        f"- **公司规模**: {job.get('company_size', '未知')}",
+        f"- **主营业务**: {job.get('company_business', '未知')}",
+        f"- **职位类型**: {job.get('job_type', '未知')}",
+    ]
+    if job.get('internship_time'):
+        lines.append(f"- **实习时间**: {job['internship_time']}")
+
+    benefits = job.get('company_benefits')
+    if benefits and benefits != '[空]':
+        lines.append("")
+        lines.append("#### 🎁 福利待遇")
+        lines.append("> " + str(benefits).replace("\n", "\n> "))
+
+    return "\n".join(lines)
+
+
+def display_single_job(job: Dict[str, Any], rank: int, map_data: pd.DataFrame = None, scope: str = "job"):
+    """
+    显示单个职位详情
+
+    Args:
+        job: 职位信息
+        rank: 排名
+        map_data: 该职位的坐标（build_job_locations 中的一行），为None时按职位信息现场构建
+        scope: 控件key前缀（同一页面多组结果时需不同）
+    """
+    if '_key' not in job:
+        prepare_job_results([job])
+    widget_key = f"{scope}_{job['_key']}"
+
+    # 职位标题与核心信息（只读文本合并为一次渲染）
+    st.markdown(format_job_summary(job))
 
     # 详细信息区域
     col_left, col_right = st.columns([2, 1])
@@ -347,36 +537,20 @@ def display_single_job(job: Dict[str, Any], rank: int):
             with st.expander("点击查看详细描述", expanded=True):
                 st.markdown(job['job_description'])
 
-        # 公司信息
-        st.subheader("🏢 公司信息")
-        company_info_col1, company_info_col2 = st.columns(2)
-
-        with company_info_col1:
-            st.write(f"**公司全称**: {job.get('company_full_name', '未知')}")
-            st.write(f"**公司规模**: {job.get('company_size', '未知')}")
-            st.write(f"**主营业务**: {job.get('company_business', '未知')}")
-
-        with company_info_col2:
-            st.write(f"**职位类型**: {job.get('job_type', '未知')}")
-            if job.get('internship_time'):
-                st.write(f"**实习时间**: {job.get('internship_time', '未知')}")
-
-        # 福利待遇
-        if job.get('company_benefits') and job['company_benefits'] != '[空]':
-            st.subheader("🎁 福利待遇")
-            st.info(job['company_benefits'])
+        # 公司信息与福利待遇
+        st.markdown(format_company_info(job))
 
     with col_right:
         # 快速操作
         st.subheader("⚡ 快速操作")
 
-        if st.button(f"💾 收藏职位", key=f"save_{rank}", use_container_width=True):
+        if st.button(f"💾 收藏职位", key=f"save_{widget_key}", use_container_width=True):
             st.success("✅ 已收藏到我的职位")
 
-        if st.button(f"📧 投递简历", key=f"apply_{rank}", use_container_width=True):
+        if st.button(f"📧 投递简历", key=f"apply_{widget_key}", use_container_width=True):
             st.info("💡 简历投递功能开发中...")
 
-        if st.button(f"🔗 查看详情", key=f"detail_{rank}", use_container_width=True):
+        if st.button(f"🔗 查看详情", key=f"detail_{widget_key}", use_container_width=True):
             st.info("💡 详情页面开发中...")
 
         # 薪资匹配度显示
@@ -402,17 +576,16 @@ def display_single_job(job: Dict[str, Any], rank: int):
         else:
             st.caption("💡 薪资匹配度: 待分析")
 
-        # 地理位置
-        if job.get('longitude') and job.get('latitude'):
+        # 地理位置（处理新输入期间跳过地图初始化，待页面刷新后再显示）
+        if job.get('longitude') and job.get('latitude') and not st.session_state.is_streaming:
             st.subheader("📍 地理位置")
             try:
-                import pandas as pd
-                map_data = pd.DataFrame({
-                    'lat': [float(job['latitude'])],
-                    'lon': [float(job['longitude'])]
-                })
+                if map_data is None:
+                    map_data = build_job_locations((parse_job_coordinates(job),))
+                if map_data.isna().to_numpy().any():
+                    raise ValueError("无效的经纬度")
                 st.map(map_data, zoom=12)
-            except:
+            except Exception:
                 st.write(f"经度: {job['longitude']}")
                 st.write(f"纬度: {job['latitude']}")
 
@@ -420,6 +593,27 @@ def display_single_job(job: Dict[str, Any], rank: int):
     st.markdown("---")
 
 
+def record_ai_stats(understood: bool, confidence: float):
+    """记录一次AI处理的理解结果与置信度（只累加计数与总和，每条消息O(1)）"""
+    stats = st.session_state.ai_stats
+    stats["total"] += 1
+    stats["understood"] += bool(understood)
+    stats["confidence_sum"] += float(confidence)
+
+
+def reset_ai_stats():
+    """清空AI处理统计"""
+    st.session_state.ai_stats = {"total": 0, "understood": 0, "confidence_sum": 0.0}
+
+
+def get_ai_stats():
+    """获取AI处理统计 (总条数, 已理解条数, 平均置信度)"""
+    stats = st.session_state.ai_stats
+    total = stats["total"]
+    avg_confidence = stats["confidence_sum"] / total if total > 0 else 0
+    return total, stats["understood"], avg_confidence
+
+
 def display_sidebar():
     """显示侧边栏"""
     with st.sidebar:
@@ -439,18 +633,20 @@ def display_sidebar():
         # 搜索设置
         st.subheader("⚙️ 搜索设置")
 
-        # 职位数量调整滑块
-        new_job_count = st.slider(
-            "🔍 职位显示数量",
-            min_value=3,
-            max_value=15,
-            value=st.session_state.job_count,
-            step=1,
-            help="选择要显示的职位数量，更多职位意味着更全面的选择"
-        )
+        # 职位数量调整滑块（放在表单中，拖动过程不触发页面刷新，点击“应用”后才生效）
+        with st.form("job_count_form"):
+            new_job_count = st.slider(
+                "🔍 职位显示数量",
+                min_value=3,
+                max_value=15,
+                value=st.session_state.job_count,
+                step=1,
+                help="选择要显示的职位数量，更多职位意味着更全面的选择"
+            )
+            job_count_applied = st.form_submit_button("应用", use_container_width=True)
 
         # 更新职位数量
-        if new_job_count != st.session_state.job_count:
+        if job_count_applied and new_job_count != st.session_state.job_count:
             st.session_state.job_count = new_job_count
             # 如果已经有搜索结果，提示重新搜索
             if st.session_state.search_completed:
@@ -463,9 +659,7 @@ def display_sidebar():
         if st.session_state.ai_processing_info:
             st.subheader("🤖 AI处理统计")
 
-            total_inputs = len(st.session_state.ai_processing_info)
-            understood_inputs = sum(1 for info in st.session_state.ai_processing_info if info.get('understood', False))
-            avg_confidence = sum(info.get('confidence', 0) for info in st.session_state.ai_processing_info) / total_inputs if total_inputs > 0 else 0
+            total_inputs, understood_inputs, avg_confidence = get_ai_stats()
 
             col1, col2 = st.columns(2)
             with col1:
@@ -503,6 +697,7 @@ def display_sidebar():
                     st.session_state.search_completed = False
                     # 清理AI处理信息
                     st.session_state.ai_processing_info = []
+                    reset_ai_stats()
                     st.rerun()
         
         if st.session_state.search_completed:
@@ -513,6 +708,7 @@ def display_sidebar():
                         search_result = st.session_state.assistant._perform_job_search(st.session_state.job_count)
                         if search_result["success"]:
                             # 更新搜索结果
+                            prepare_job_results(search_result["results"])
                             st.session_state.search_results = search_result["results"]
                             st.success(f"✅ 重新搜索完成！找到 {len(search_result['results'])} 个职位")
                             st.rerun()
@@ -526,22 +722,7 @@ def display_sidebar():
         
         # 帮助信息
         st.subheader("💡 使用提示")
-        st.markdown("""
-        **智能对话特点：**
-        - 🤖 **AI理解**：系统能智能理解您的自然语言输入
-        - 🎯 **精准匹配**：混合检索技术确保薪资精确匹配
-        - 💬 **友好引导**：遇到不清楚的输入会耐心引导
-
-        **输入示例：**
-        - 职位：python、前端、设计师、产品经理
-        - 地点：深圳、北上广、远程办公
-        - 薪资：15K、15-20K、月薪1万、年薪30万
-
-        **AI会自动：**
-        - ✅ 理解简化输入（如"python"→"Python开发工程师"）
-        - ✅ 补全缺失信息（如"15-20"→"15-20K"）
-        - ✅ 识别无效输入并友好提示
-        """)
+        st.markdown(USAGE_TIPS)
 
 
 def main():
@@ -6,16 +6,226 @@
 第二阶段：关键词+数值范围过滤（精确薪资匹配）
 """
 
+import math
 import re
+from functools import lru_cache
+import numpy as np
 from typing import List, Dict, Any, Tuple, Optional
+from keyword_matcher import KeywordMatcher
 from rag_core import load_existing_rag_system
 from incremental_vector_store import IncrementalVectorStore
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+# 默认薪资容忍比例；入库时预先解析的职位薪资区间（元数据 salary_range）按此比例计算
+DEFAULT_SALARY_TOLERANCE = 0.2
+
+# 薪资区间比较结果类型（下标即 _score_salary_ranges 返回的类型编码）
+_RANGE_MATCH_TYPES = ("薪资不匹配", "完全匹配", "高度匹配", "部分匹配", "轻微匹配", "略低于期望", "略高于期望")
+
+
+def _score_salary_ranges(job_mins, job_maxs, user_min, user_max, tolerance_ratio):
+    """
+    批量计算职位薪资区间与用户期望区间的匹配度（纯数值运算，可被Numba编译）
+
+    Returns:
+        (匹配度分数数组, 匹配类型编码数组)，类型编码对应 _RANGE_MATCH_TYPES
+    """
+    n = job_mins.shape[0]
+    scores = np.zeros(n, dtype=np.float64)
+    codes = np.zeros(n, dtype=np.int64)
+    user_size = user_max - user_min
+
+    for i in range(n):
+        job_min = job_mins[i]
+        job_max = job_maxs[i]
+
+        # 计算重叠区间
+        overlap_min = max(user_min, job_min)
+        overlap_max = min(user_max, job_max)
+
+        if overlap_min <= overlap_max:
+            # 计算重叠比例（相对于用户期望范围）
+            if user_size > 0:
+                overlap_ratio = (overlap_max - overlap_min) / user_size
+            else:
+                overlap_ratio = 1.0
+
+            scores[i] = overlap_ratio
+            if overlap_ratio >= 0.8:
+                codes[i] = 1
+            elif overlap_ratio >= 0.5:
+                codes[i] = 2
+            elif overlap_ratio >= 0.3:
+                codes[i] = 3
+            else:
+                codes[i] = 4
+        elif job_max < user_min:
+            # 无重叠，检查是否在容忍范围内
+            gap_ratio = (user_min - job_max) / user_min if user_min > 0 else 1.0
+            if gap_ratio <= tolerance_ratio:
+                scores[i] = 0.2
+                codes[i] = 5
+        elif job_min > user_max:
+            gap_ratio = (job_min - user_max) / user_max if user_max > 0 else 1.0
+            if gap_ratio <= tolerance_ratio:
+                scores[i] = 0.2
+                codes[i] = 6
+
+    return scores, codes
+
+
+if njit is not None:
+    _score_salary_ranges = njit(cache=True)(_score_salary_ranges)
+
+
+def _compute_salary_range(kind, a, b, scale, tolerance_ratio):
+    """
+    将薪资正则提取出的数值换算为月薪区间（纯数值运算，可被Numba编译）
+
+    Args:
+        kind: 换算方式（_RANGE_KIND 等）
+        a: 第一个数值
+        b: 第二个数值（单值格式与 a 相同）
+        scale: 单位倍数
+        tolerance_ratio: 容忍比例
+
+    Returns:
+        (最低月薪, 最高月薪)，均为截断取整后的浮点数
+    """
+    if kind == _RANGE_KIND:
+        return np.trunc(a * scale), np.trunc(b * scale)
+    if kind == _ABOVE_KIND:
+        low = np.trunc(a * scale)
+        return low, low * 3  # 设置一个合理的上限
+    if kind == _AROUND_KIND:
+        center = np.trunc(a * scale)
+    else:
+        center = np.trunc(a * scale / 12)
+    tolerance = np.trunc(center * tolerance_ratio)
+    return center - tolerance, center + tolerance
+
+
+if njit is not None:
+    _compute_salary_range = njit(cache=True)(_compute_salary_range)
+
+
+# 批量匹配结果类型：在区间比较结果之后追加面议情况
+_SALARY_MATCH_TYPES = _RANGE_MATCH_TYPES + ("用户面议", "双方面议", "职位面议")
+_USER_NEGOTIABLE, _BOTH_NEGOTIABLE, _JOB_NEGOTIABLE = range(len(_RANGE_MATCH_TYPES), len(_SALARY_MATCH_TYPES))
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    按分数从高到低选出前k个下标（分数相同时保持原顺序）
+    先用 partition 在O(N)内找出第k大的分数，只对入选的k个下标排序，结果与稳定排序后取前k个一致
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < n:
+        kth_score = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth_score)
+        ties = np.flatnonzero(scores == kth_score)[:k - above.size]
+        selected = np.concatenate((above, ties))
+    else:
+        selected = np.arange(n)
+    return selected[np.lexsort((selected, -scores[selected]))]
+
+
+# 薪资数值换算方式（_compute_salary_range 的 kind 参数）
+_RANGE_KIND = 0     # 区间：(a, b)
+_ABOVE_KIND = 1     # 以上：(a, 3a)
+_AROUND_KIND = 2    # 单值：a 上下浮动容忍比例
+_ANNUAL_KIND = 3    # 年薪：换算为月薪后上下浮动容忍比例
+
+# 单位倍数为None时按文本中是否含"万"取 10000 或 1000（K）
+_K_OR_WAN = None
+
+# 各薪资模式必须包含的标记（文本经过 lower()，K 统一为 k）
+_K_WAN_MARKERS = frozenset(('k', '万'))
+
+# 薪资解析模式（按优先级排序）：(分支名, 正则, 换算方式, 单位倍数, 标记)
+# 文本至少包含标记中的一个，该模式才可能匹配
+_SALARY_PATTERNS = (
+    # 1. 范围格式: 10-15K, 10-15万, 10K-15K
+    ("range_k_wan", r'(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)[kK万]', _RANGE_KIND, _K_OR_WAN, _K_WAN_MARKERS),
+    ("range_unit_k_wan", r'(\d+(?:\.\d+)?)[kK万]-(\d+(?:\.\d+)?)[kK万]', _RANGE_KIND, _K_OR_WAN, _K_WAN_MARKERS),
+
+    # 2. 以上格式: 10K以上, 10万以上
+    ("above_k_wan", r'(\d+(?:\.\d+)?)[kK万]以上', _ABOVE_KIND, _K_OR_WAN, _K_WAN_MARKERS),
+
+    # 3. 左右格式: 10K左右, 10万左右
+    ("around_k_wan", r'(\d+(?:\.\d+)?)[kK万]左右', _AROUND_KIND, _K_OR_WAN, _K_WAN_MARKERS),
+
+    # 4. 单一数值: 10K, 10万
+    ("single_k_wan", r'(\d+(?:\.\d+)?)[kK万](?![-以左右])', _AROUND_KIND, _K_OR_WAN, _K_WAN_MARKERS),
+
+    # 5. 千元格式: 8千-12千, 10千
+    ("range_thousand", r'(\d+(?:\.\d+)?)千-(\d+(?:\.\d+)?)千', _RANGE_KIND, 1000.0, frozenset(('千',))),
+    ("single_thousand", r'(\d+(?:\.\d+)?)千', _AROUND_KIND, 1000.0, frozenset(('千',))),
+
+    # 6. 月薪格式: 月薪12000
+    ("monthly", r'月薪(\d+)', _AROUND_KIND, 1.0, frozenset(('月薪',))),
+
+    # 7. 年薪格式: 年薪30万, 年薪300000
+    ("annual_wan", r'年薪(\d+(?:\.\d+)?)万', _ANNUAL_KIND, 10000.0, frozenset(('年薪',))),
+    ("annual", r'年薪(\d+)', _ANNUAL_KIND, 1.0, frozenset(('年薪',))),
+
+    # 8. 纯数字范围: 10000-15000
+    ("range_number", r'(\d+)-(\d+)(?![kK万千])', _RANGE_KIND, 1.0, frozenset(('-',))),
+
+    # 9. 带薪字数: 25-50K·16薪
+    ("range_k_wan_months", r'(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)[kK万]·\d+薪', _RANGE_KIND, _K_OR_WAN, _K_WAN_MARKERS),
+)
+
+
+def _compile_salary_patterns(patterns):
+    """
+    将所有薪资模式合并为一个正则，一次匹配即可确定命中的分支
+
+    每个分支写作 `.*?(?P<分支名>模式)` 并从文本开头匹配：前面的分支只要在文本任意位置
+    能匹配就优先生效，与逐个 re.search 的优先级一致
+
+    Returns:
+        (合并后的正则, {分支名: (换算方式, 单位倍数, 该分支捕获组在 match.groups() 中的切片)})
+    """
+    branches = {}
+    alternatives = []
+    group_count = 0
+    for name, pattern, kind, scale, _ in patterns:
+        inner_groups = re.compile(pattern).groups
+        # 分支自身的命名组占一个编号，其内部捕获组紧随其后
+        branches[name] = (kind, scale, slice(group_count + 1, group_count + 1 + inner_groups))
+        group_count += 1 + inner_groups
+        alternatives.append(f".*?(?P<{name}>{pattern})")
+    return re.compile("(?:" + "|".join(alternatives) + ")", re.DOTALL), branches
+
+
+# 明确表示面议的薪资文本（含空文本），直接视为无法解析
+_SALARY_SENTINELS = frozenset(('', '面议', '薪资面议', '待遇面议'))
+
+# 一次扫描找出文本中出现的全部标记
+_SALARY_MARKER_MATCHER = KeywordMatcher(('k', '万', '千', '月薪', '年薪', '-'))
+
+
+@lru_cache(maxsize=64)
+def _salary_patterns_for(markers: frozenset):
+    """只合并可能匹配（标记出现在文本中）的薪资模式，按标记组合缓存"""
+    return _compile_salary_patterns(
+        tuple(pattern for pattern in _SALARY_PATTERNS if pattern[4] & markers)
+    )
+
 
 class SalaryFilter:
     """薪资过滤器 - 基于关键词和数值范围"""
     
-    def __init__(self, tolerance_ratio: float = 0.2):
+    def __init__(self, tolerance_ratio: float = DEFAULT_SALARY_TOLERANCE):
         """
         初始化薪资过滤器
         
@@ -23,6 +233,8 @@ class SalaryFilter:
             tolerance_ratio: 薪资容忍比例，例如0.2表示上下浮动20%
         """
         self.tolerance_ratio = tolerance_ratio
+        # 薪资解析失败次数，持续增长说明数据中存在无法正确解析的薪资文本
+        self._parse_failures = 0
     
     def parse_salary_number(self, salary_text: str) -> Optional[Tuple[int, int]]:
         """
@@ -34,141 +246,79 @@ class SalaryFilter:
         Returns:
             (min_salary, max_salary) 或 None
         """
-        if not salary_text or salary_text.strip() in ['面议', '薪资面议', '待遇面议']:
+        try:
+            return _parse_salary_cached(salary_text, self.tolerance_ratio)
+        except ValueError as e:
+            self._parse_failures += 1
+            print(f"⚠️ 薪资解析失败（累计 {self._parse_failures} 次）: {e}")
             return None
-        
-        salary_text = salary_text.strip().lower()
-        
-        # 薪资解析模式（按优先级排序）
-        patterns = [
-            # 1. 范围格式: 10-15K, 10-15万, 10K-15K
-            (r'(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)[kK万]', self._parse_range_k_wan),
-            (r'(\d+(?:\.\d+)?)[kK万]-(\d+(?:\.\d+)?)[kK万]', self._parse_range_k_wan),
-            
-            # 2. 以上格式: 10K以上, 10万以上
-            (r'(\d+(?:\.\d+)?)[kK万]以上', self._parse_above_k_wan),
-            
-            # 3. 左右格式: 10K左右, 10万左右
-            (r'(\d+(?:\.\d+)?)[kK万]左右', self._parse_around_k_wan),
-            
-            # 4. 单一数值: 10K, 10万
-            (r'(\d+(?:\.\d+)?)[kK万](?![-以左右])', self._parse_single_k_wan),
-            
-            # 5. 千元格式: 8千-12千, 10千
-            (r'(\d+(?:\.\d+)?)千-(\d+(?:\.\d+)?)千', self._parse_range_thousand),
-            (r'(\d+(?:\.\d+)?)千', self._parse_single_thousand),
-            
-            # 6. 月薪格式: 月薪12000
-            (r'月薪(\d+)', self._parse_monthly),
-            
-            # 7. 年薪格式: 年薪30万, 年薪300000
-            (r'年薪(\d+(?:\.\d+)?)万', self._parse_annual_wan),
-            (r'年薪(\d+)', self._parse_annual),
-            
-            # 8. 纯数字范围: 10000-15000
-            (r'(\d+)-(\d+)(?![kK万千])', self._parse_range_number),
-            
-            # 9. 带薪字数: 25-50K·16薪
-            (r'(\d+(?:\.\d+)?)-(\d+(?:\.\d+)?)[kK万]·\d+薪', self._parse_range_k_wan_with_months),
-        ]
-        
-        for pattern, parser in patterns:
-            match = re.search(pattern, salary_text)
-            if match:
-                try:
-                    result = parser(match, salary_text)
-                    if result:
-                        return result
-                except:
-                    continue
-        
-        return None
-    
-    def _parse_range_k_wan(self, match, salary_text):
-        """解析范围格式：10-15K, 10-15万"""
-        min_val, max_val = float(match.group(1)), float(match.group(2))
-        if '万' in salary_text:
-            return (int(min_val * 10000), int(max_val * 10000))
-        else:  # K
-            return (int(min_val * 1000), int(max_val * 1000))
-    
-    def _parse_above_k_wan(self, match, salary_text):
-        """解析以上格式：10K以上"""
-        val = float(match.group(1))
-        if '万' in salary_text:
-            min_val = int(val * 10000)
-            return (min_val, min_val * 3)  # 设置一个合理的上限
-        else:  # K
-            min_val = int(val * 1000)
-            return (min_val, min_val * 3)
-    
-    def _parse_around_k_wan(self, match, salary_text):
-        """解析左右格式：10K左右"""
-        val = float(match.group(1))
-        if '万' in salary_text:
-            center = int(val * 10000)
-        else:  # K
-            center = int(val * 1000)
-        
-        tolerance = int(center * self.tolerance_ratio)
-        return (center - tolerance, center + tolerance)
-    
-    def _parse_single_k_wan(self, match, salary_text):
-        """解析单一数值：10K, 10万"""
-        val = float(match.group(1))
-        if '万' in salary_text:
-            salary = int(val * 10000)
-        else:  # K
-            salary = int(val * 1000)
-        
-        tolerance = int(salary * self.tolerance_ratio)
-        return (salary - tolerance, salary + tolerance)
-    
-    def _parse_range_thousand(self, match, salary_text):
-        """解析千元范围：8千-12千"""
-        min_val, max_val = float(match.group(1)), float(match.group(2))
-        return (int(min_val * 1000), int(max_val * 1000))
-    
-    def _parse_single_thousand(self, match, salary_text):
-        """解析单一千元：10千"""
-        val = float(match.group(1))
-        salary = int(val * 1000)
-        tolerance = int(salary * self.tolerance_ratio)
-        return (salary - tolerance, salary + tolerance)
-    
-    def _parse_monthly(self, match, salary_text):
-        """解析月薪：月薪12000"""
-        salary = int(match.group(1))
-        tolerance = int(salary * self.tolerance_ratio)
-        return (salary - tolerance, salary + tolerance)
-    
-    def _parse_annual_wan(self, match, salary_text):
-        """解析年薪万元：年薪30万"""
-        annual = float(match.group(1)) * 10000
-        monthly = int(annual / 12)
-        tolerance = int(monthly * self.tolerance_ratio)
-        return (monthly - tolerance, monthly + tolerance)
-    
-    def _parse_annual(self, match, salary_text):
-        """解析年薪：年薪300000"""
-        annual = int(match.group(1))
-        monthly = int(annual / 12)
-        tolerance = int(monthly * self.tolerance_ratio)
-        return (monthly - tolerance, monthly + tolerance)
-    
-    def _parse_range_number(self, match, salary_text):
-        """解析纯数字范围：10000-15000"""
-        min_val, max_val = int(match.group(1)), int(match.group(2))
-        return (min_val, max_val)
-    
-    def _parse_range_k_wan_with_months(self, match, salary_text):
-        """解析带薪字数：25-50K·16薪"""
-        min_val, max_val = float(match.group(1)), float(match.group(2))
-        if '万' in salary_text:
-            return (int(min_val * 10000), int(max_val * 10000))
-        else:  # K
-            return (int(min_val * 1000), int(max_val * 1000))
     
+    def match_job_salaries(self, user_salary: str, job_salaries: List[str]) -> List[Tuple[bool, float, str]]:
+        """
+        批量判断多个职位薪资是否匹配：用户薪资只解析一次，区间比较交给数值内核一次完成
+
+        Args:
+            user_salary: 用户期望薪资
+            job_salaries: 职位薪资列表
+
+        Returns:
+            与 job_salaries 一一对应的 (是否匹配, 匹配度分数, 匹配类型) 列表
+        """
+        user_range = self.parse_salary_number(user_salary)
+        job_ranges = [self.parse_salary_number(job_salary) for job_salary in job_salaries]
+        return self.match_job_salary_ranges(user_range, job_ranges)
+
+    def match_job_salary_ranges(self, user_range: Optional[Tuple[int, int]],
+                                job_ranges: List[Optional[Tuple[int, int]]]) -> List[Tuple[bool, float, str]]:
+        """
+        批量判断多个已解析的职位薪资区间是否匹配（见 match_job_salaries）
+
+        Args:
+            user_range: 用户期望薪资区间，None表示面议
+            job_ranges: 职位薪资区间列表，None表示面议
+
+        Returns:
+            与 job_ranges 一一对应的 (是否匹配, 匹配度分数, 匹配类型) 列表
+        """
+        matched, scores, codes = self.score_job_salary_ranges(user_range, job_ranges)
+        return [(is_match, score, _SALARY_MATCH_TYPES[code])
+                for is_match, score, code in zip(matched.tolist(), scores.tolist(), codes.tolist())]
+
+    def score_job_salary_ranges(self, user_range: Optional[Tuple[int, int]],
+                                job_ranges: List[Optional[Tuple[int, int]]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        批量计算多个已解析的职位薪资区间的匹配结果（按列返回NumPy数组）
+
+        Args:
+            user_range: 用户期望薪资区间，None表示面议
+            job_ranges: 职位薪资区间列表，None表示面议
+
+        Returns:
+            (是否匹配数组, 匹配度分数数组, 匹配类型编码数组)，类型编码对应 _SALARY_MATCH_TYPES
+        """
+        n = len(job_ranges)
+        has_range = np.fromiter((bool(job_range) for job_range in job_ranges), dtype=bool, count=n)
+        matched = np.ones(n, dtype=bool)
+
+        # 处理面议情况
+        if not user_range:
+            scores = np.where(has_range, 0.4, 0.5)
+            codes = np.where(has_range, _USER_NEGOTIABLE, _BOTH_NEGOTIABLE)
+            return matched, scores, codes
+
+        scores = np.full(n, 0.3)
+        codes = np.full(n, _JOB_NEGOTIABLE, dtype=np.int64)
+        if has_range.any():
+            # 面议职位以 -1 占位，只取有区间的职位交给数值内核
+            bounds = np.array([job_range or (-1, -1) for job_range in job_ranges], dtype=np.float64)[has_range]
+            range_scores, range_codes = _score_salary_ranges(
+                bounds[:, 0], bounds[:, 1], float(user_range[0]), float(user_range[1]), self.tolerance_ratio
+            )
+            scores[has_range] = range_scores
+            codes[has_range] = range_codes
+            matched[has_range] = range_codes != 0
+        return matched, scores, codes
+
     def is_salary_match(self, user_salary: str, job_salary: str) -> Tuple[bool, float, str]:
         """
         判断薪资是否匹配
@@ -180,59 +330,110 @@ class SalaryFilter:
         Returns:
             (是否匹配, 匹配度分数, 匹配类型)
         """
-        user_range = self.parse_salary_number(user_salary)
-        job_range = self.parse_salary_number(job_salary)
-        
-        # 处理面议情况
-        if not user_range and not job_range:
-            return (True, 0.5, "双方面议")
-        elif not user_range:
-            return (True, 0.4, "用户面议")
-        elif not job_range:
-            return (True, 0.3, "职位面议")
-        
-        user_min, user_max = user_range
-        job_min, job_max = job_range
-        
-        # 计算重叠区间
-        overlap_min = max(user_min, job_min)
-        overlap_max = min(user_max, job_max)
-        
-        if overlap_min <= overlap_max:
-            # 有重叠
-            overlap_size = overlap_max - overlap_min
-            user_size = user_max - user_min
-            job_size = job_max - job_min
-            
-            # 计算重叠比例（相对于用户期望范围）
-            if user_size > 0:
-                overlap_ratio = overlap_size / user_size
-            else:
-                overlap_ratio = 1.0
-            
-            # 判断匹配类型
-            if overlap_ratio >= 0.8:
-                return (True, overlap_ratio, "完全匹配")
-            elif overlap_ratio >= 0.5:
-                return (True, overlap_ratio, "高度匹配")
-            elif overlap_ratio >= 0.3:
-                return (True, overlap_ratio, "部分匹配")
-            else:
-                return (True, overlap_ratio, "轻微匹配")
-        else:
-            # 无重叠，检查是否在容忍范围内
-            if job_max < user_min:
-                gap = user_min - job_max
-                gap_ratio = gap / user_min if user_min > 0 else 1.0
-                if gap_ratio <= self.tolerance_ratio:
-                    return (True, 0.2, "略低于期望")
-            elif job_min > user_max:
-                gap = job_min - user_max
-                gap_ratio = gap / user_max if user_max > 0 else 1.0
-                if gap_ratio <= self.tolerance_ratio:
-                    return (True, 0.2, "略高于期望")
-            
-            return (False, 0.0, "薪资不匹配")
+        try:
+            return _match_salary_cached(user_salary, job_salary, self.tolerance_ratio)
+        except ValueError:
+            # 解析失败的一方按面议处理，并计入解析失败次数
+            return self.is_salary_match_prange(
+                self.parse_salary_number(user_salary), self.parse_salary_number(job_salary)
+            )
+
+    def is_salary_match_prange(self, user_range: Optional[Tuple[int, int]],
+                               job_range: Optional[Tuple[int, int]]) -> Tuple[bool, float, str]:
+        """
+        判断已解析的薪资区间是否匹配（跳过文本解析，见 is_salary_match）
+
+        Args:
+            user_range: 用户期望薪资区间，None表示面议
+            job_range: 职位薪资区间，None表示面议
+
+        Returns:
+            (是否匹配, 匹配度分数, 匹配类型)
+        """
+        return _match_salary_ranges(user_range, job_range, self.tolerance_ratio)
+
+    def get_job_salary_range(self, metadata: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+        """
+        获取职位的薪资区间：优先使用入库时预先解析的 salary_range，缺失或容忍比例不同时现场解析
+
+        Args:
+            metadata: 职位文档的元数据
+
+        Returns:
+            (min_salary, max_salary) 或 None
+        """
+        if 'salary_range' in metadata and self.tolerance_ratio == DEFAULT_SALARY_TOLERANCE:
+            return metadata['salary_range']
+        return self.parse_salary_number(metadata.get('salary', '面议'))
+
+
+@lru_cache(maxsize=8192)
+def _parse_salary_cached(salary_text: str, tolerance_ratio: float) -> Optional[Tuple[int, int]]:
+    """
+    按 (薪资文本, 容忍比例) 缓存的薪资解析，相同的薪资文本在多次查询间只解析一次
+
+    Raises:
+        ValueError: 匹配到的薪资数值无法换算为有效的月薪区间
+    """
+    salary_text = salary_text.strip() if salary_text else ''
+    # 面议或不含任何数字的文本不可能匹配任何薪资模式，跳过后续扫描与正则
+    if salary_text in _SALARY_SENTINELS or not any(ch.isdigit() for ch in salary_text):
+        return None
+    
+    salary_text = salary_text.lower()
+    
+    # 先用多模式匹配找出单位等标记：没有任何标记（如"面议"）时不可能匹配，跳过正则
+    markers = frozenset(_SALARY_MARKER_MATCHER.iter(salary_text))
+    if not markers:
+        return None
+    
+    salary_pattern, branches = _salary_patterns_for(markers)
+    match = salary_pattern.match(salary_text)
+    if not match:
+        return None
+    
+    kind, scale, groups = branches[match.lastgroup]
+    values = match.groups()[groups]
+    if scale is _K_OR_WAN:
+        scale = 10000.0 if '万' in salary_text else 1000.0
+    
+    low, high = _compute_salary_range(
+        kind, float(values[0]), float(values[-1]), scale, float(tolerance_ratio)
+    )
+    # 数字位数过多或容忍比例异常时换算结果不是有限值，无法转为整数
+    if not (math.isfinite(low) and math.isfinite(high)):
+        raise ValueError(f"薪资数值超出范围: {salary_text!r}")
+    return (int(low), int(high))
+
+
+@lru_cache(maxsize=16384)
+def _match_salary_cached(user_salary: str, job_salary: str, tolerance_ratio: float) -> Tuple[bool, float, str]:
+    """按 (用户薪资, 职位薪资, 容忍比例) 缓存的薪资匹配结果，见 SalaryFilter.is_salary_match"""
+    return _match_salary_ranges(
+        _parse_salary_cached(user_salary, tolerance_ratio),
+        _parse_salary_cached(job_salary, tolerance_ratio),
+        tolerance_ratio
+    )
+
+
+def _match_salary_ranges(user_range: Optional[Tuple[int, int]], job_range: Optional[Tuple[int, int]],
+                         tolerance_ratio: float) -> Tuple[bool, float, str]:
+    """比较已解析的用户与职位薪资区间"""
+    # 处理面议情况
+    if not user_range and not job_range:
+        return (True, 0.5, "双方面议")
+    elif not user_range:
+        return (True, 0.4, "用户面议")
+    elif not job_range:
+        return (True, 0.3, "职位面议")
+    
+    # 与批量匹配共用同一个数值内核，以单元素数组调用
+    scores, codes = _score_salary_ranges(
+        np.array([job_range[0]], dtype=np.float64), np.array([job_range[1]], dtype=np.float64),
+        float(user_range[0]), float(user_range[1]), float(tolerance_ratio)
+    )
+    code = int(codes[0])
+    return (code != 0, float(scores[0]), _RANGE_MATCH_TYPES[code])
 
 
 class HybridRetrievalSystem:
@@ -265,10 +466,11 @@ class HybridRetrievalSystem:
                 print("❌ 向量存储初始化失败")
                 return False
             
-            # 加载RAG系统
+            # 加载RAG系统：复用向量存储管理器已加载的向量存储及其嵌入模型
             self.rag_system = load_existing_rag_system(
                 vector_store_path=self.vector_store_path,
-                use_streaming=False
+                use_streaming=False,
+                vector_store=self.vector_manager.get_vector_store()
             )
             
             print("✅ 混合检索系统初始化成功")
@@ -311,35 +513,30 @@ class HybridRetrievalSystem:
             # 第二阶段：薪资关键词过滤
             print(f"💰 第二阶段 - 薪资过滤: {salary_requirement}")
             
-            filtered_results = []
-            for doc in vector_results:
+            # 薪资匹配检查：用户薪资只解析一次，职位薪资优先使用入库时预先解析的区间
+            user_range = self.salary_filter.parse_salary_number(salary_requirement)
+            job_ranges = [self.salary_filter.get_job_salary_range(doc.metadata) for doc in vector_results]
+            matched, scores, codes = self.salary_filter.score_job_salary_ranges(user_range, job_ranges)
+
+            # 在匹配的候选中按薪资匹配度选出前k个，只为最终结果构建返回数据
+            candidates = np.flatnonzero(matched)
+            top_indices = candidates[_top_k_indices(scores[candidates], k)]
+
+            final_results = []
+            for index in top_indices.tolist():
+                doc = vector_results[index]
                 metadata = doc.metadata
-                job_salary = metadata.get('salary', '面议')
-                
-                # 薪资匹配检查
-                is_match, match_score, match_type = self.salary_filter.is_salary_match(
-                    salary_requirement, job_salary
-                )
-                
-                if is_match:
-                    result_item = {
-                        "document": doc,
-                        "job_title": metadata.get('job_title', '未知'),
-                        "company_name": metadata.get('company_name', '未知'),
-                        "salary": job_salary,
-                        "location": metadata.get('location', '未知'),
-                        "salary_match_score": match_score,
-                        "salary_match_type": match_type,
-                        "user_salary": salary_requirement,
-                        "structured_fields": metadata.get('structured_fields', {})
-                    }
-                    filtered_results.append(result_item)
-            
-            # 按薪资匹配度排序
-            filtered_results.sort(key=lambda x: x["salary_match_score"], reverse=True)
-            
-            # 返回前k个结果
-            final_results = filtered_results[:k]
+                final_results.append({
+                    "document": doc,
+                    "job_title": metadata.get('job_title', '未知'),
+                    "company_name": metadata.get('company_name', '未知'),
+                    "salary": metadata.get('salary', '面议'),
+                    "location": metadata.get('location', '未知'),
+                    "salary_match_score": float(scores[index]),
+                    "salary_match_type": _SALARY_MATCH_TYPES[codes[index]],
+                    "user_salary": salary_requirement,
+                    "structured_fields": metadata.get('structured_fields', {})
+                })
             
             print(f"✅ 薪资过滤后返回 {len(final_results)} 个匹配职位")
             
@@ -8,12 +8,82 @@
 import os
 import json
 import hashlib
+import mmap
 import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Optional
-from document_loader import load_documents, split_documents
-from vector_store import create_vector_store, load_vector_store, create_embeddings
-from langchain_community.vectorstores import FAISS
+from document_types import is_supported_document
+
+# document_loader 与 vector_store 会引入 langchain、pandas 等重量级依赖，
+# 仅在真正加载文档或向量存储的方法内导入，检查更新、获取统计信息时无需加载
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# 文件变更检测使用的哈希算法：优先 BLAKE3 / xxHash（SIMD加速），均未安装时使用标准库 BLAKE2b
+if blake3 is not None:
+    HASH_ALGO = 'blake3'
+elif xxhash is not None:
+    HASH_ALGO = 'xxh3_64'
+else:
+    HASH_ALGO = 'blake2b'
+
+# 并行计算文件哈希的线程数
+_HASH_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+
+def _new_hasher(algo: str):
+    """创建指定算法的哈希对象（旧版元数据使用 md5）"""
+    if algo == 'blake3':
+        return blake3.blake3()
+    if algo == 'xxh3_64':
+        return xxhash.xxh3_64()
+    return hashlib.new(algo)
+
+
+def _counted(iterable, counts: Dict, key: str):
+    """透传可迭代对象的元素，同时在 counts[key] 中累计数量"""
+    for item in iterable:
+        counts[key] += 1
+        yield item
+
+
+def _counted_by_file(documents, file_counts: Dict):
+    """透传文档，同时按来源文件名在 file_counts 中累计文档数量"""
+    for document in documents:
+        filename = os.path.basename(document.metadata.get('source', ''))
+        file_counts[filename] = file_counts.get(filename, 0) + 1
+        yield document
+
+
+def _with_salary_ranges(chunks):
+    """
+    透传文本块，同时在元数据中附加预先解析的薪资区间 salary_range
+    入库时解析一次，检索时无需再对每个候选职位解析薪资文本
+    """
+    from hybrid_retrieval_system import SalaryFilter
+
+    salary_filter = SalaryFilter()
+    for chunk in chunks:
+        salary = chunk.metadata.get('salary')
+        if salary is not None:
+            chunk.metadata['salary_range'] = salary_filter.parse_salary_number(salary)
+        yield chunk
 
 
 class IncrementalVectorStore:
@@ -23,48 +93,109 @@ class IncrementalVectorStore:
         self.vector_store_path = vector_store_path
         self.metadata_file = os.path.join(vector_store_path, "metadata.json")
         self.vector_store = None
+        self._embeddings = None
         self.metadata = {}
+        # 已加载元数据对应的文件版本 (修改时间, 大小)，文件未变化时无需重新解析
+        self._metadata_version = None
         
-    def _calculate_file_hash(self, file_path: str) -> str:
-        """计算文件的MD5哈希值"""
-        hash_md5 = hashlib.md5()
+    def _get_embeddings(self):
+        """获取嵌入模型（首次使用时创建，之后的加载、重建与增量更新共用同一实例）"""
+        if self._embeddings is None:
+            from vector_store import create_embeddings
+            self._embeddings = create_embeddings()
+        return self._embeddings
+    
+    def _calculate_file_hash(self, file_path: str, algo: str = HASH_ALGO) -> str:
+        """计算文件的哈希值（通过 mmap 整体交给哈希函数，不逐块复制到Python）"""
         try:
+            hasher = _new_hasher(algo)
             with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+                # 空文件无法 mmap
+                if os.fstat(f.fileno()).st_size:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        hasher.update(mapped)
+            return hasher.hexdigest()
         except Exception as e:
             print(f"计算文件哈希失败 {file_path}: {e}")
             return ""
     
     def _get_documents_info(self, documents_dir: str) -> Dict:
-        """获取文档目录的信息"""
+        """
+        获取文档目录的信息
+        大小与修改时间都与元数据记录一致的文件直接沿用已记录的哈希，其余文件重新计算
+        """
         docs_info = {}
         
         if not os.path.exists(documents_dir):
             return docs_info
         
-        for filename in os.listdir(documents_dir):
-            file_path = os.path.join(documents_dir, filename)
-            if os.path.isfile(file_path) and filename.endswith(('.xlsx', '.xls', '.pdf', '.docx', '.txt')):
-                file_hash = self._calculate_file_hash(file_path)
-                file_stat = os.stat(file_path)
+        # 元数据中的哈希算法与当前一致时才可沿用
+        if self.metadata.get('hash_algo', 'md5') != HASH_ALGO:
+            stored_docs = {}
+        else:
+            stored_docs = self.metadata.get('documents', {})
+        
+        pending = []
+        # scandir 一次读取目录即可得到文件类型，无需为每个文件单独拼接路径、判断类型
+        with os.scandir(documents_dir) as entries:
+            for entry in entries:
+                filename = entry.name
+                if not is_supported_document(filename) or not entry.is_file():
+                    continue
+                file_path = entry.path
+                file_stat = entry.stat()
+                
+                prev = stored_docs.get(filename)
+                if (prev and prev.get('hash') and prev.get('size') == file_stat.st_size
+                        and prev.get('modified_time') == file_stat.st_mtime):
+                    docs_info[filename] = dict(prev, path=file_path, modified_time_ns=file_stat.st_mtime_ns)
+                    continue
                 
                 docs_info[filename] = {
-                    'hash': file_hash,
+                    'hash': None,
                     'size': file_stat.st_size,
                     'modified_time': file_stat.st_mtime,
+                    'modified_time_ns': file_stat.st_mtime_ns,
                     'path': file_path
                 }
+                pending.append(filename)
+        
+        # 新增或变更的文件并行计算哈希（读文件与哈希计算都会释放GIL）
+        paths = [docs_info[filename]['path'] for filename in pending]
+        if len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=min(_HASH_WORKERS, len(paths))) as executor:
+                hashes = list(executor.map(self._calculate_file_hash, paths))
+        else:
+            hashes = [self._calculate_file_hash(path) for path in paths]
+        
+        for filename, file_hash in zip(pending, hashes):
+            docs_info[filename]['hash'] = file_hash
         
         return docs_info
     
+    def _metadata_file_version(self):
+        """元数据文件的 (修改时间, 大小)，文件不存在时为None"""
+        try:
+            file_stat = os.stat(self.metadata_file)
+        except OSError:
+            return None
+        return (file_stat.st_mtime_ns, file_stat.st_size)
+    
     def _load_metadata(self) -> Dict:
-        """加载元数据"""
-        if os.path.exists(self.metadata_file):
+        """加载元数据（优先使用 orjson；文件自上次加载或保存后未变化时直接返回已加载的元数据）"""
+        version = self._metadata_file_version()
+        if version is not None:
+            if version == self._metadata_version and self.metadata:
+                return self.metadata
             try:
-                with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                if orjson is not None:
+                    with open(self.metadata_file, 'rb') as f:
+                        metadata = orjson.loads(f.read())
+                else:
+                    with open(self.metadata_file, 'r', encoding='utf-8') as f:
+                        metadata = json.load(f)
+                self._metadata_version = version
+                return metadata
             except Exception as e:
                 print(f"加载元数据失败: {e}")
         
@@ -74,25 +205,69 @@ class IncrementalVectorStore:
             'documents': {},
             'total_documents': 0,
             'total_chunks': 0,
+            'hash_algo': HASH_ALGO,
             'version': '1.0'
         }
     
     def _save_metadata(self):
         """保存元数据"""
-        os.makedirs(os.path.dirname(self.metadata_file), exist_ok=True)
-        
         self.metadata['last_updated'] = datetime.now().isoformat()
-        
         try:
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+            self._write_metadata_file(self.metadata, self.metadata_file)
+            self._metadata_version = self._metadata_file_version()
         except Exception as e:
             print(f"保存元数据失败: {e}")
     
+    @staticmethod
+    def _write_metadata_file(metadata: Dict, metadata_file: str):
+        """
+        将元数据写入指定文件（优先使用 orjson，不做缩进排版）
+        先完整写入临时文件并落盘，再原子替换，写入中途崩溃不会损坏已有元数据；
+        临时文件名唯一，同一进程中的多个写入方不会互相覆盖或删除对方的临时文件
+        """
+        metadata_dir = os.path.dirname(metadata_file)
+        os.makedirs(metadata_dir, exist_ok=True)
+        
+        if orjson is not None:
+            data = orjson.dumps(metadata, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            data = json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+        
+        fd, tmp_path = tempfile.mkstemp(dir=metadata_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, metadata_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def _migrate_hashes(self, current_docs: Dict, stored_algo: str):
+        """
+        将元数据中旧算法的文件哈希换算为当前算法（只更新哈希表，不重建向量存储）
+        未变更的文件用旧算法校验一致后换成新哈希；已变更的文件保留旧哈希，仍会被识别为修改
+        """
+        print(f"🔑 文件哈希算法由 {stored_algo} 切换为 {HASH_ALGO}，更新哈希记录...")
+        stored_docs = self.metadata.get('documents', {})
+        for filename, info in current_docs.items():
+            stored = stored_docs.get(filename)
+            if stored and self._calculate_file_hash(info['path'], stored_algo) == stored['hash']:
+                stored['hash'] = info['hash']
+        
+        self.metadata['hash_algo'] = HASH_ALGO
+        if os.path.exists(self.metadata_file):
+            self._save_metadata()
+    
     def check_updates_needed(self, documents_dir: str) -> Dict:
         """检查是否需要更新"""
-        current_docs = self._get_documents_info(documents_dir)
         self.metadata = self._load_metadata()
+        current_docs = self._get_documents_info(documents_dir)
+        stored_algo = self.metadata.get('hash_algo', 'md5')
+        if stored_algo != HASH_ALGO:
+            self._migrate_hashes(current_docs, stored_algo)
         stored_docs = self.metadata.get('documents', {})
         
         result = {
@@ -131,7 +306,8 @@ class IncrementalVectorStore:
         
         if not update_info['needs_update'] and not force_rebuild and os.path.exists(self.vector_store_path):
             print("✅ 向量存储已是最新，无需更新")
-            self.vector_store = load_vector_store(self.vector_store_path)
+            from vector_store import load_vector_store
+            self.vector_store = load_vector_store(self.vector_store_path, self._get_embeddings())
             return True
         
         # 显示更新信息
@@ -158,48 +334,61 @@ class IncrementalVectorStore:
             print(f"✅ 未变更文件: {len(update_info['unchanged_files'])} 个")
         
         # 决定更新策略
-        if force_rebuild or len(update_info['deleted_files']) > 0 or len(update_info['modified_files']) > 0:
+        if force_rebuild:
             # 完全重建
             return self._full_rebuild(documents_dir)
         else:
-            # 增量更新
-            return self._incremental_update(documents_dir, update_info['new_files'])
+            # 增量更新：删除已删除/已修改文件的向量，再加入新增/已修改文件
+            return self._incremental_update(
+                documents_dir,
+                update_info['new_files'] + update_info['modified_files'],
+                update_info['modified_files'] + update_info['deleted_files']
+            )
     
     def _full_rebuild(self, documents_dir: str) -> bool:
         """完全重建向量存储"""
         print("🔄 执行完全重建...")
+        from document_loader import iter_document_files, iter_split_documents
+        from vector_store import create_vector_store_batched
         
         try:
-            # 删除旧的向量存储
-            if os.path.exists(self.vector_store_path):
-                shutil.rmtree(self.vector_store_path)
+            # 新的向量存储先写入临时目录，完成后再替换旧目录，重建过程中旧向量存储保持可用
+            new_path = f"{self.vector_store_path}.tmp"
+            if os.path.exists(new_path):
+                shutil.rmtree(new_path)
             
-            # 加载所有文档
-            print("📚 加载所有文档...")
-            documents = load_documents(documents_dir)
+            # 流式加载、分割文档并分批写入向量存储，内存中只保留当前批次
+            print("📚 加载、分割文档并创建向量存储...")
+            # 只加载本次扫描到的文件，元数据与向量存储中的文件保持一致
+            current_docs = self._get_documents_info(documents_dir)
+            paths = [info['path'] for info in current_docs.values()]
+            counts = {'documents': 0, 'chunks': 0}
+            file_counts = {}
+            documents = _counted(_counted_by_file(iter_document_files(paths), file_counts), counts, 'documents')
+            chunks = _counted(_with_salary_ranges(iter_split_documents(documents)), counts, 'chunks')
+            self.vector_store = create_vector_store_batched(chunks, new_path, embeddings=self._get_embeddings())
             
-            if not documents:
+            if self.vector_store is None:
                 print("❌ 没有找到文档")
                 return False
             
-            print(f"✅ 成功加载 {len(documents)} 个文档")
-            
-            # 分割文档
-            print("✂️ 分割文档...")
-            chunks = split_documents(documents)
-            print(f"✅ 文档分割完成，共 {len(chunks)} 个块")
+            print(f"✅ 成功加载 {counts['documents']} 个文档，共 {counts['chunks']} 个块")
             
-            # 创建向量存储
-            print("🧮 创建向量存储...")
-            self.vector_store = create_vector_store(chunks, self.vector_store_path)
+            # 元数据先写入新目录再替换目录，新向量存储与其元数据一起生效，
+            # 替换前后任何时刻崩溃都不会留下缺少元数据的向量存储
+            metadata = dict(self._load_metadata())
+            for filename, info in current_docs.items():
+                info['document_count'] = file_counts.get(filename, 0)
+            metadata['documents'] = current_docs
+            metadata['hash_algo'] = HASH_ALGO
+            metadata['total_documents'] = counts['documents']
+            metadata['total_chunks'] = counts['chunks']
+            metadata['last_updated'] = datetime.now().isoformat()
+            self._write_metadata_file(metadata, os.path.join(new_path, os.path.basename(self.metadata_file)))
             
-            # 更新元数据
-            current_docs = self._get_documents_info(documents_dir)
-            self.metadata = self._load_metadata()
-            self.metadata['documents'] = current_docs
-            self.metadata['total_documents'] = len(documents)
-            self.metadata['total_chunks'] = len(chunks)
-            self._save_metadata()
+            self._replace_vector_store_dir(new_path)
+            self.metadata = metadata
+            self._metadata_version = self._metadata_file_version()
             
             print("✅ 向量存储重建完成")
             return True
@@ -208,62 +397,110 @@ class IncrementalVectorStore:
             print(f"❌ 重建失败: {e}")
             return False
     
-    def _incremental_update(self, documents_dir: str, new_files: List[str]) -> bool:
-        """增量更新向量存储"""
+    def _replace_vector_store_dir(self, new_path: str):
+        """用新目录替换向量存储目录（两次重命名），旧目录在后台线程中删除"""
+        old_path = f"{self.vector_store_path}.old"
+        if os.path.exists(old_path):
+            shutil.rmtree(old_path, ignore_errors=True)
+        
+        if os.path.exists(self.vector_store_path):
+            os.rename(self.vector_store_path, old_path)
+        os.rename(new_path, self.vector_store_path)
+        
+        if os.path.exists(old_path):
+            threading.Thread(
+                target=shutil.rmtree, args=(old_path,), kwargs={'ignore_errors': True}, daemon=True
+            ).start()
+    
+    def _docstore_ids_of_files(self, filenames: List[str]) -> List[str]:
+        """获取向量存储中来源于指定文件的所有文本块ID"""
+        targets = set(filenames)
+        docstore = self.vector_store.docstore
+        return [
+            doc_id for doc_id in self.vector_store.index_to_docstore_id.values()
+            if os.path.basename(docstore.search(doc_id).metadata.get('source', '')) in targets
+        ]
+    
+    def _incremental_update(self, documents_dir: str, new_files: List[str],
+                            removed_files: List[str] = ()) -> bool:
+        """
+        增量更新向量存储，工作量只与变更的文件相关
+        
+        Args:
+            documents_dir: 文档目录
+            new_files: 需要加入的文件（新增及修改的文件）
+            removed_files: 需要移除旧向量的文件（修改及删除的文件）
+        """
         print("📈 执行增量更新...")
+        from document_loader import load_document_files, split_documents
+        from vector_store import load_vector_store, delete_vectors
+        
+        if not os.path.exists(self.vector_store_path):
+            print("🆕 创建新的向量存储...")
+            return self._full_rebuild(documents_dir)
+        
+        # 在副本上计算变更，向量存储保存成功后才写回元数据，失败时内存中的元数据保持不变
+        stored_docs = dict(self.metadata['documents'])
+        if removed_files:
+            if any('document_count' not in stored_docs.get(filename, {}) for filename in removed_files):
+                # 旧版元数据没有记录各文件的文档数，无法正确更新统计
+                print("⚠️ 元数据缺少文件文档数，执行完全重建")
+                return self._full_rebuild(documents_dir)
         
         try:
             # 加载现有向量存储
-            if os.path.exists(self.vector_store_path):
-                print("📂 加载现有向量存储...")
-                self.vector_store = load_vector_store(self.vector_store_path)
-            else:
-                print("🆕 创建新的向量存储...")
-                return self._full_rebuild(documents_dir)
+            print("📂 加载现有向量存储...")
+            self.vector_store = load_vector_store(self.vector_store_path, self._get_embeddings())
+            
+            # 移除已删除、已修改文件的旧向量
+            removed_documents = 0
+            if removed_files:
+                removed_ids = self._docstore_ids_of_files(removed_files)
+                print(f"🗑️ 移除 {len(removed_files)} 个文件的 {len(removed_ids)} 个块")
+                if removed_ids:
+                    delete_vectors(self.vector_store, removed_ids)
+                for filename in removed_files:
+                    removed_documents += stored_docs.pop(filename)['document_count']
             
-            # 处理新文件
-            new_documents = []
+            # 只解析新增及修改的文件；检查更新后才出现的文件留到下次更新，期间已删除的文件跳过
+            current_docs = self._get_documents_info(documents_dir)
+            new_files = [filename for filename in new_files if filename in current_docs]
             for filename in new_files:
-                file_path = os.path.join(documents_dir, filename)
                 print(f"📄 处理新文件: {filename}")
-                
-                # 加载单个文件
-                if filename.endswith(('.xlsx', '.xls')):
-                    from document_loader import load_excel_document
-                    docs = load_excel_document(file_path)
-                    new_documents.extend(docs)
-                # 可以添加其他文件类型的处理
+            file_counts = {}
+            new_documents = list(_counted_by_file(
+                load_document_files([current_docs[filename]['path'] for filename in new_files]),
+                file_counts
+            ))
             
-            if not new_documents:
+            if new_documents:
+                print(f"✅ 新增 {len(new_documents)} 个文档")
+                
+                # 分割新文档
+                new_chunks = list(_with_salary_ranges(split_documents(new_documents)))
+                print(f"✅ 新文档分割完成，共 {len(new_chunks)} 个块")
+                
+                # 添加到现有向量存储：一次批量计算所有新文本块的向量，直接写入现有索引
+                print("🔗 添加到现有向量存储...")
+                embeddings = self._get_embeddings()
+                
+                texts = [chunk.page_content for chunk in new_chunks]
+                metadatas = [chunk.metadata for chunk in new_chunks]
+                vectors = embeddings.embed_documents(texts)
+                self.vector_store.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+            elif not removed_files:
                 print("⚠️ 没有新文档需要添加")
                 return True
             
-            print(f"✅ 新增 {len(new_documents)} 个文档")
-            
-            # 分割新文档
-            new_chunks = split_documents(new_documents)
-            print(f"✅ 新文档分割完成，共 {len(new_chunks)} 个块")
-            
-            # 添加到现有向量存储
-            print("🔗 添加到现有向量存储...")
-            embeddings = create_embeddings()
-            
-            # 创建新文档的向量存储
-            new_vector_store = FAISS.from_documents(new_chunks, embeddings)
-            
-            # 合并向量存储
-            self.vector_store.merge_from(new_vector_store)
-            
             # 保存更新后的向量存储
             self.vector_store.save_local(self.vector_store_path)
             
             # 更新元数据
-            current_docs = self._get_documents_info(documents_dir)
-            self.metadata['documents'].update({
-                filename: current_docs[filename] for filename in new_files
-            })
-            self.metadata['total_documents'] += len(new_documents)
-            self.metadata['total_chunks'] += len(new_chunks)
+            for filename in new_files:
+                stored_docs[filename] = dict(current_docs[filename], document_count=file_counts.get(filename, 0))
+            self.metadata['documents'] = stored_docs
+            self.metadata['total_documents'] += len(new_documents) - removed_documents
+            self.metadata['total_chunks'] = self.vector_store.index.ntotal
             self._save_metadata()
             
             print("✅ 增量更新完成")
@@ -271,6 +508,8 @@ class IncrementalVectorStore:
             
         except Exception as e:
             print(f"❌ 增量更新失败: {e}")
+            # 内存中的向量存储可能已删除部分向量，丢弃后由重建或下次加载恢复
+            self.vector_store = None
             print("🔄 回退到完全重建...")
             return self._full_rebuild(documents_dir)
     
@@ -278,7 +517,8 @@ class IncrementalVectorStore:
         """获取向量存储"""
         if self.vector_store is None:
             if os.path.exists(self.vector_store_path):
-                self.vector_store = load_vector_store(self.vector_store_path)
+                from vector_store import load_vector_store
+                self.vector_store = load_vector_store(self.vector_store_path, self._get_embeddings())
             else:
                 raise ValueError("向量存储不存在，请先创建")
         return self.vector_store
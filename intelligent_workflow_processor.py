@@ -5,11 +5,67 @@
 使用AI大模型处理每个对话阶段，提供更智能的用户输入理解和响应
 """
 
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from conversation_state import ConversationStage, ConversationStateManager
+from keyword_matcher import KeywordMatcher
 from qa_chain import create_llm
 import json
 import re
+import threading
+import unicodedata
+
+
+# 各信息收集阶段对应的需求字段，以及示例中该字段的显示名称
+_STAGE_FIELDS = {
+    ConversationStage.COLLECTING_JOB_TYPE: ("job_type", "职位类型"),
+    ConversationStage.COLLECTING_LOCATION: ("location", "地点"),
+    ConversationStage.COLLECTING_SALARY: ("salary", "薪资"),
+}
+
+# 各阶段统一的输出格式，只有提取的字段不同（字段名与显示名称见 _STAGE_FIELDS）
+_OUTPUT_FORMAT = """请分析用户输入并返回JSON格式：
+{{
+    "understood": true/false,
+    "{field}": "提取的{label}" 或 null,
+    "confidence": 0.0-1.0,
+    "response": "给用户的回复"
+}}"""
+
+# 回退处理中识别职位类型的关键词（与小写化后的输入匹配）
+_JOB_KEYWORD_MATCHER = KeywordMatcher((
+    "开发", "工程师", "程序员", "设计师", "产品经理", "运营", "销售",
+    "python", "java", "前端", "后端", "ui", "ux", "数据", "算法"
+))
+
+# 回退处理中识别的城市，输入包含多个城市时取列表中靠前的城市
+_FALLBACK_CITIES = (
+    "北京", "上海", "广州", "深圳", "杭州", "南京", "苏州", "成都",
+    "武汉", "西安", "重庆", "天津", "青岛", "大连", "厦门", "长沙"
+)
+_CITY_PRIORITY = {city: index for index, city in enumerate(_FALLBACK_CITIES)}
+_CITY_MATCHER = KeywordMatcher(_FALLBACK_CITIES)
+
+# 回退处理中识别薪资的模式：数字加单位（K、万、千）或"面议"
+# 原有的 "10-15K"、"年薪30万" 等写法都包含 数字+单位，由同一个分支覆盖
+_FALLBACK_SALARY_RE = re.compile(r'\d+[kK万千]|面议')
+
+# 用于在流式输出中识别已完整的JSON对象
+_JSON_DECODER = json.JSONDecoder()
+
+# AI解析结果缓存的最大条目数
+_AI_RESULT_CACHE_SIZE = 4096
+
+
+def _normalize_text(text: str) -> str:
+    """规范化文本（全半角统一、去除首尾空白、转小写），用于构建缓存键"""
+    return unicodedata.normalize('NFKC', text).strip().lower()
+
+
+def _copy_ai_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """复制处理结果，避免调用方修改缓存中的数据"""
+    return {**result, "extracted_info": dict(result["extracted_info"])}
 
 
 class IntelligentWorkflowProcessor:
@@ -19,6 +75,11 @@ class IntelligentWorkflowProcessor:
         self.llm = None
         self._initialize_llm()
         
+        # AI解析结果缓存：(阶段, 规范化输入, 最近对话) -> 处理结果，按最近使用淘汰
+        # 处理器在多个会话间共享，读写需要加锁
+        self._ai_result_cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._ai_result_cache_lock = threading.Lock()
+        
         # 各阶段的AI提示模板
         self.stage_prompts = {
             ConversationStage.COLLECTING_JOB_TYPE: {
@@ -34,15 +95,7 @@ class IntelligentWorkflowProcessor:
 - 设计类：UI设计师、UX设计师、平面设计师、产品设计师
 - 管理类：产品经理、项目经理、运营经理、技术总监
 - 销售类：销售代表、客户经理、商务拓展
-- 其他：人事专员、财务分析师、市场营销等
-
-请分析用户输入并返回JSON格式：
-{
-    "understood": true/false,
-    "job_type": "提取的职位类型" 或 null,
-    "confidence": 0.0-1.0,
-    "response": "给用户的回复"
-}""",
+- 其他：人事专员、财务分析师、市场营销等""",
                 
                 "examples": [
                     {"input": "python", "job_type": "Python开发工程师", "confidence": 0.8},
@@ -64,15 +117,7 @@ class IntelligentWorkflowProcessor:
 - 一线城市：北京、上海、广州、深圳
 - 新一线城市：杭州、成都、武汉、南京、西安、苏州
 - 其他城市：青岛、大连、厦门、长沙、郑州等
-- 特殊情况：远程办公、在家办公、不限地点
-
-请分析用户输入并返回JSON格式：
-{
-    "understood": true/false,
-    "location": "提取的地点" 或 null,
-    "confidence": 0.0-1.0,
-    "response": "给用户的回复"
-}""",
+- 特殊情况：远程办公、在家办公、不限地点""",
                 
                 "examples": [
                     {"input": "深圳", "location": "深圳", "confidence": 1.0},
@@ -94,15 +139,7 @@ class IntelligentWorkflowProcessor:
 - 范围格式：15-20K、10-15万、8千-1万2
 - 单一数值：15K、20万、月薪12000
 - 模糊表达：20K以上、15万左右、面议
-- 年薪表达：年薪30万、年收入50万
-
-请分析用户输入并返回JSON格式：
-{
-    "understood": true/false,
-    "salary": "提取的薪资" 或 null,
-    "confidence": 0.0-1.0,
-    "response": "给用户的回复"
-}""",
+- 年薪表达：年薪30万、年收入50万""",
                 
                 "examples": [
                     {"input": "15K", "salary": "15K", "confidence": 1.0},
@@ -112,6 +149,19 @@ class IntelligentWorkflowProcessor:
                 ]
             }
         }
+        
+        # 各阶段的规则回退处理
+        self._stage_fallbacks = {
+            ConversationStage.COLLECTING_JOB_TYPE: self._fallback_job_type,
+            ConversationStage.COLLECTING_LOCATION: self._fallback_location,
+            ConversationStage.COLLECTING_SALARY: self._fallback_salary,
+        }
+        
+        # 各阶段提示中与用户输入无关的部分只构建一次，并作为系统消息放在最前面，
+        # 每次请求的前缀相同，支持前缀缓存的模型服务可以复用
+        self._system_messages = {
+            stage: SystemMessage(content=self._build_static_prompt(stage)) for stage in self.stage_prompts
+        }
     
     def _initialize_llm(self):
         """初始化大语言模型"""
@@ -140,83 +190,156 @@ class IntelligentWorkflowProcessor:
         if current_stage not in self.stage_prompts:
             return self._fallback_processing(user_input, current_stage)
         
+        # 规则即可确定结果的输入不调用AI：空输入、纯标点符号、一两位的数字（如"1"），以及恰好是城市名的地点
+        # 薪资阶段的纯数字可能是省略单位的薪资（如"15"），仍交给AI理解
+        stripped = user_input.strip()
+        if (not any(ch.isalnum() for ch in stripped)
+                or (len(stripped) <= 2 and stripped.isdigit()
+                    and current_stage != ConversationStage.COLLECTING_SALARY)
+                or (current_stage == ConversationStage.COLLECTING_LOCATION and stripped in _CITY_PRIORITY)):
+            return self._fallback_processing(stripped, current_stage)
+        
+        # 相同阶段、相同输入和上下文的请求直接复用之前的AI解析结果
+        cache_key = self._ai_cache_key(user_input, current_stage, conversation_history)
+        cached_result = self._get_cached_ai_result(cache_key)
+        if cached_result is not None:
+            return cached_result
+        
         try:
             # 构建AI提示
             prompt = self._build_ai_prompt(user_input, current_stage, conversation_history)
             
-            # 调用AI模型
-            response = self.llm.invoke(prompt)
-            
-            # 解析AI响应
-            if hasattr(response, 'content'):
-                ai_response = response.content.strip()
-            else:
-                ai_response = str(response).strip()
+            # 流式调用AI模型，JSON对象完整后即停止接收
+            ai_response, json_end = self._stream_ai_response(prompt)
             
             # 尝试解析JSON
             try:
-                result = json.loads(ai_response)
-                return self._validate_ai_result(result, current_stage)
+                result = json.loads(ai_response[:json_end])
             except json.JSONDecodeError:
                 # 如果不是JSON格式，尝试从文本中提取信息
                 return self._extract_from_text_response(ai_response, user_input, current_stage)
+            
+            validated = self._validate_ai_result(result, current_stage)
+            # 只缓存格式正确的AI结果，格式异常时下次仍重新调用模型
+            if isinstance(result, dict):
+                self._cache_ai_result(cache_key, validated)
+            return validated
                 
         except Exception as e:
             print(f"AI处理失败: {e}")
             return self._fallback_processing(user_input, current_stage)
     
-    def _build_ai_prompt(self, user_input: str, current_stage: ConversationStage,
-                        conversation_history: List[Dict] = None) -> str:
-        """构建AI提示"""
+    def _stream_ai_response(self, prompt: List[BaseMessage]) -> Tuple[str, Optional[int]]:
+        """
+        流式调用AI模型
+        
+        输出以JSON对象开头时，对象一完整就关闭流（终止后续生成），不再等待对象之后的多余文本
+        
+        Returns:
+            (AI输出文本, 完整JSON对象的结束位置；未提前结束时为None)
+        """
+        parts = []
+        stream = self.llm.stream(prompt)
+        try:
+            for chunk in stream:
+                content = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                parts.append(content)
+                # 只有收到右花括号时JSON对象才可能完整
+                if '}' not in content:
+                    continue
+                ai_response = ''.join(parts).strip()
+                if not ai_response.startswith('{'):
+                    continue
+                try:
+                    _, json_end = _JSON_DECODER.raw_decode(ai_response)
+                except json.JSONDecodeError:
+                    continue
+                return ai_response, json_end
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+        
+        return ''.join(parts).strip(), None
+    
+    @staticmethod
+    def _ai_cache_key(user_input: str, current_stage: ConversationStage,
+                      conversation_history: List[Dict] = None) -> Tuple:
+        """
+        构建AI解析结果的缓存键
+        
+        提示词包含最近4轮对话（确认性回复依赖上下文），因此缓存键同样包含这部分对话，
+        输入与对话内容规范化后比较，大小写、全半角不同的相同输入可以命中
+        """
+        history_key = tuple(
+            (msg.get("role") == "assistant", _normalize_text(msg.get("content", "")[:100]))
+            for msg in (conversation_history or [])[-4:]
+        )
+        return (current_stage, _normalize_text(user_input), history_key)
+    
+    def _get_cached_ai_result(self, cache_key: Tuple) -> Optional[Dict[str, Any]]:
+        """获取缓存的AI解析结果，未命中时返回None"""
+        with self._ai_result_cache_lock:
+            result = self._ai_result_cache.get(cache_key)
+            if result is None:
+                return None
+            self._ai_result_cache.move_to_end(cache_key)
+        return _copy_ai_result(result)
+    
+    def _cache_ai_result(self, cache_key: Tuple, result: Dict[str, Any]):
+        """缓存AI解析结果，超出容量时淘汰最久未使用的条目"""
+        with self._ai_result_cache_lock:
+            self._ai_result_cache[cache_key] = _copy_ai_result(result)
+            self._ai_result_cache.move_to_end(cache_key)
+            if len(self._ai_result_cache) > _AI_RESULT_CACHE_SIZE:
+                self._ai_result_cache.popitem(last=False)
+    
+    def _build_static_prompt(self, current_stage: ConversationStage) -> str:
+        """构建阶段提示中的固定部分：任务说明、输出格式、注意事项与示例"""
         stage_config = self.stage_prompts[current_stage]
+        field, label = _STAGE_FIELDS[current_stage]
 
         prompt = f"""{stage_config['system_prompt']}
 
-对话上下文："""
-
-        # 添加对话历史上下文
-        if conversation_history:
-            recent_history = conversation_history[-4:]  # 最近4轮对话
-            for msg in recent_history:
-                role = "助手" if msg.get("role") == "assistant" else "用户"
-                content = msg.get("content", "")
-                prompt += f"\n{role}: {content[:100]}..."  # 限制长度
-
-        prompt += f"""
-
-当前用户输入："{user_input}"
+{_OUTPUT_FORMAT.format(field=field, label=label)}
 
 重要提示：
 1. 如果用户输入是确认性回复（如"是的"、"对"、"没错"、"好的"等），请检查对话历史中是否有待确认的信息
 2. 如果用户输入是否定性回复（如"不是"、"不对"、"错了"等），表示需要重新收集信息
 3. 考虑对话上下文来理解用户的真实意图
 
-请分析这个输入并返回JSON格式的结果。
-
 示例：
 """
 
         # 添加示例
         for example in stage_config['examples']:
-            prompt += f"输入：\"{example['input']}\" -> "
-            if current_stage == ConversationStage.COLLECTING_JOB_TYPE:
-                prompt += f"职位类型：{example.get('job_type', 'null')}\n"
-            elif current_stage == ConversationStage.COLLECTING_LOCATION:
-                prompt += f"地点：{example.get('location', 'null')}\n"
-            elif current_stage == ConversationStage.COLLECTING_SALARY:
-                prompt += f"薪资：{example.get('salary', 'null')}\n"
+            prompt += f"输入：\"{example['input']}\" -> {label}：{example.get(field, 'null')}\n"
 
         # 添加确认回复的示例
-        prompt += f"""
+        prompt += """
 特殊情况示例：
 输入："是的" (在询问Python开发工程师确认后) -> 职位类型：Python开发工程师
 输入："对的" (在询问深圳确认后) -> 地点：深圳
-输入："不是" (在询问确认后) -> 需要重新收集
-
-现在请分析用户输入："{user_input}"
-"""
+输入："不是" (在询问确认后) -> 需要重新收集"""
 
         return prompt
+
+    def _build_ai_prompt(self, user_input: str, current_stage: ConversationStage,
+                        conversation_history: List[Dict] = None) -> List[BaseMessage]:
+        """构建AI提示：固定部分作为系统消息，对话上下文与当前输入作为用户消息"""
+        # 对话历史上下文：最近4轮对话，每条限制长度
+        history_lines = "".join(
+            f"\n{'助手' if msg.get('role') == 'assistant' else '用户'}: {msg.get('content', '')[:100]}..."
+            for msg in (conversation_history or [])[-4:]
+        )
+
+        prompt = f"""对话上下文：{history_lines}
+
+当前用户输入："{user_input}"
+
+请分析这个输入并返回JSON格式的结果。"""
+
+        return [self._system_messages[current_stage], HumanMessage(content=prompt)]
     
     def _validate_ai_result(self, result: Dict, current_stage: ConversationStage) -> Dict[str, Any]:
         """验证AI返回结果"""
@@ -230,18 +353,11 @@ class IntelligentWorkflowProcessor:
         
         # 根据阶段提取相应字段
         extracted_info = {}
-        if current_stage == ConversationStage.COLLECTING_JOB_TYPE:
-            job_type = result.get('job_type')
-            if job_type:
-                extracted_info['job_type'] = job_type
-        elif current_stage == ConversationStage.COLLECTING_LOCATION:
-            location = result.get('location')
-            if location:
-                extracted_info['location'] = location
-        elif current_stage == ConversationStage.COLLECTING_SALARY:
-            salary = result.get('salary')
-            if salary:
-                extracted_info['salary'] = salary
+        if current_stage in _STAGE_FIELDS:
+            field = _STAGE_FIELDS[current_stage][0]
+            value = result.get(field)
+            if value:
+                extracted_info[field] = value
         
         return {
             "understood": understood,
@@ -268,12 +384,9 @@ class IntelligentWorkflowProcessor:
     def _fallback_processing(self, user_input: str, current_stage: ConversationStage) -> Dict[str, Any]:
         """回退处理逻辑（当AI不可用时）"""
         # 使用规则基础的处理
-        if current_stage == ConversationStage.COLLECTING_JOB_TYPE:
-            return self._fallback_job_type(user_input)
-        elif current_stage == ConversationStage.COLLECTING_LOCATION:
-            return self._fallback_location(user_input)
-        elif current_stage == ConversationStage.COLLECTING_SALARY:
-            return self._fallback_salary(user_input)
+        fallback = self._stage_fallbacks.get(current_stage)
+        if fallback is not None:
+            return fallback(user_input)
         
         return {
             "understood": False,
@@ -285,15 +398,7 @@ class IntelligentWorkflowProcessor:
     
     def _fallback_job_type(self, user_input: str) -> Dict[str, Any]:
         """职位类型回退处理"""
-        job_keywords = [
-            "开发", "工程师", "程序员", "设计师", "产品经理", "运营", "销售",
-            "python", "java", "前端", "后端", "ui", "ux", "数据", "算法"
-        ]
-        
-        user_lower = user_input.lower()
-        found_keywords = [kw for kw in job_keywords if kw in user_lower]
-        
-        if found_keywords:
+        if _JOB_KEYWORD_MATCHER.search(user_input.lower()):
             return {
                 "understood": True,
                 "extracted_info": {"job_type": user_input.strip()},
@@ -312,19 +417,15 @@ class IntelligentWorkflowProcessor:
     
     def _fallback_location(self, user_input: str) -> Dict[str, Any]:
         """地点回退处理"""
-        cities = [
-            "北京", "上海", "广州", "深圳", "杭州", "南京", "苏州", "成都",
-            "武汉", "西安", "重庆", "天津", "青岛", "大连", "厦门", "长沙"
-        ]
-        
-        found_cities = [city for city in cities if city in user_input]
+        found_cities = _CITY_MATCHER.find_all(user_input)
         
         if found_cities:
+            city = min(found_cities, key=_CITY_PRIORITY.__getitem__)
             return {
                 "understood": True,
-                "extracted_info": {"location": found_cities[0]},
+                "extracted_info": {"location": city},
                 "confidence": 0.9,
-                "ai_response": f"好的，工作地点是{found_cities[0]}。",
+                "ai_response": f"好的，工作地点是{city}。",
                 "needs_clarification": False
             }
         
@@ -338,19 +439,14 @@ class IntelligentWorkflowProcessor:
     
     def _fallback_salary(self, user_input: str) -> Dict[str, Any]:
         """薪资回退处理"""
-        salary_patterns = [
-            r'\d+[kK万]', r'\d+-\d+[kK万]', r'\d+千', r'面议', r'年薪\d+万'
-        ]
-        
-        for pattern in salary_patterns:
-            if re.search(pattern, user_input):
-                return {
-                    "understood": True,
-                    "extracted_info": {"salary": user_input.strip()},
-                    "confidence": 0.8,
-                    "ai_response": f"好的，薪资期望是{user_input}。",
-                    "needs_clarification": False
-                }
+        if _FALLBACK_SALARY_RE.search(user_input):
+            return {
+                "understood": True,
+                "extracted_info": {"salary": user_input.strip()},
+                "confidence": 0.8,
+                "ai_response": f"好的，薪资期望是{user_input}。",
+                "needs_clarification": False
+            }
         
         return {
             "understood": False,
@@ -5,12 +5,28 @@
 简洁的求职搜索工具
 """
 
+import math
+import re
+import pandas as pd
 import streamlit as st
 import time
+from typing import Any, Dict, List, Optional
 from simple_job_finder import SimpleJobFinder
 from incremental_vector_store import IncrementalVectorStore
 from resume_advisor import create_resume_advisor
 
+# Streamlit 片段装饰器（>=1.37 为 st.fragment，1.33~1.36 为 st.experimental_fragment），不可用时按普通函数执行
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# 职位描述中的分句符号，格式化时替换为列表项
+_DESCRIPTION_SEPARATORS = re.compile('[；。]')
+
+# 公司信息两栏显示的内容：(显示名称, 结构化字段名)
+_COMPANY_INFO_COLUMNS = (
+    (('公司全称', '公司全称'), ('公司规模', '公司规模'), ('主营业务', '主营业务'), ('融资情况', '是否融资')),
+    (('注册资金', '注册资金'), ('成立时间', '成立时间'), ('公司类型', '公司类型'), ('经营状态', '经营状态')),
+)
+
 
 def initialize_session_state():
     """初始化会话状态"""
@@ -26,33 +42,76 @@ def initialize_session_state():
     if 'search_results' not in st.session_state:
         st.session_state.search_results = []
 
+    if 'search_details' not in st.session_state:
+        st.session_state.search_details = []
+
+    if 'search_summary' not in st.session_state:
+        st.session_state.search_summary = {}
+
     if 'resume_advisor' not in st.session_state:
         st.session_state.resume_advisor = None
 
     if 'resume_advice_cache' not in st.session_state:
         st.session_state.resume_advice_cache = {}
 
-    if 'selected_job_for_advice' not in st.session_state:
-        st.session_state.selected_job_for_advice = None
+    if 'resume_advice_open' not in st.session_state:
+        st.session_state.resume_advice_open = set()  # 已展开简历建议界面的职位
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_job_finder() -> Optional[SimpleJobFinder]:
+    """
+    创建并初始化共享的求职助手（同一服务进程内只初始化一次，刷新页面不会重新加载向量存储）
+
+    Returns:
+        已初始化的求职助手；初始化失败时返回None
+    """
+    finder = SimpleJobFinder()
+    return finder if finder.initialize() else None
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def check_vector_store_updates(vector_store_path: str, documents_dir: str) -> Dict:
+    """检查向量存储更新需求（缓存60秒）"""
+    return IncrementalVectorStore(vector_store_path).check_updates_needed(documents_dir)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_vector_store_metadata(vector_store_path: str) -> Dict:
+    """读取向量存储元数据（缓存60秒）"""
+    return IncrementalVectorStore(vector_store_path)._load_metadata()
+
+
+def vector_store_version(vector_store_path: str):
+    """向量存储的版本：元数据文件的 (修改时间, 大小)，重建或增量更新后随之变化"""
+    return IncrementalVectorStore(vector_store_path)._metadata_file_version()
+
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def search_jobs_cached(search_query: str, k: int, store_version=None):
+    """
+    按 (搜索查询, 结果数量, 向量存储版本) 缓存检索结果（缓存10分钟），重复提交相同条件时不再重新检索
+    向量存储更新后版本变化，不会继续返回旧的检索结果
+    """
+    return get_shared_job_finder().rag_system.search(search_query, k=k)
 
 
 def initialize_system():
     """初始化求职系统"""
     if not st.session_state.system_initialized:
         with st.spinner("🔄 正在初始化智能求职助手..."):
-            # 显示向量存储状态
-            vector_manager = IncrementalVectorStore("vector_store")
-
             # 检查更新需求
-            update_info = vector_manager.check_updates_needed('documents')
+            update_info = check_vector_store_updates("vector_store", 'documents')
             if update_info['needs_update']:
                 if update_info['new_files']:
                     st.info(f"📄 发现 {len(update_info['new_files'])} 个新文件，正在更新向量存储...")
                 if update_info['modified_files']:
                     st.info(f"📝 发现 {len(update_info['modified_files'])} 个修改文件，正在重建向量存储...")
 
-            finder = SimpleJobFinder()
-            if finder.initialize():
+            shared_finder = get_shared_job_finder()
+            if shared_finder is not None:
+                # 每个会话使用独立的求职需求，共享已加载的RAG系统
+                finder = shared_finder.new_session()
                 st.session_state.job_finder = finder
                 # 初始化简历建议器
                 st.session_state.resume_advisor = create_resume_advisor(finder.rag_system)
@@ -60,7 +119,7 @@ def initialize_system():
                 st.success("✅ 系统初始化成功！")
 
                 # 显示向量存储统计
-                metadata = vector_manager._load_metadata()
+                metadata = load_vector_store_metadata("vector_store")
                 if metadata:
                     col1, col2, col3 = st.columns(3)
                     with col1:
@@ -72,6 +131,8 @@ def initialize_system():
 
                 return True
             else:
+                # 不缓存失败的初始化，下次刷新页面时重试
+                get_shared_job_finder.clear()
                 st.error("❌ 系统初始化失败，请检查配置")
                 return False
     return True
@@ -159,10 +220,12 @@ def perform_search(requirements, search_count):
         
         try:
             # 执行搜索
-            results = st.session_state.job_finder.rag_system.search(search_query, k=search_count)
+            results = search_jobs_cached(search_query, search_count, vector_store_version("vector_store"))
             
             if results:
                 st.session_state.search_results = results
+                st.session_state.search_details = prepare_job_details(results)
+                st.session_state.search_summary = summarize_search_results(results)
                 st.session_state.search_completed = True
                 st.success(f"✅ 找到 {len(results)} 个匹配的职位！")
                 st.rerun()
@@ -184,99 +247,127 @@ def display_search_results():
     # 创建标签页
     tabs = st.tabs([f"职位 {i+1}" for i in range(len(st.session_state.search_results))])
     
-    for i, (tab, doc) in enumerate(zip(tabs, st.session_state.search_results)):
+    for i, (tab, doc, detail) in enumerate(zip(tabs, st.session_state.search_results,
+                                               st.session_state.search_details)):
         with tab:
-            display_job_detail(doc, i+1)
+            display_job_detail(doc, i+1, detail)
     
     # 搜索总结
     display_search_summary()
 
 
-def display_job_detail(doc, job_number):
+def prepare_job_details(results) -> List[Dict[str, Any]]:
+    """
+    搜索完成后为每个职位预先计算展示数据（格式化后的职位描述等）
+    页面每次交互都会重新渲染所有职位标签页，渲染时直接使用计算结果
+    """
+    details = []
+    for doc in results:
+        structured_fields = doc.metadata.get('structured_fields', {})
+        job_info = structured_fields.get('职位信息', '')
+        details.append({
+            'description': format_job_description(job_info) if job_info and job_info.strip() else '',
+            'map_data': build_job_map_data(structured_fields),
+            'company_columns': format_company_columns(structured_fields),
+        })
+    return details
+
+
+def format_company_columns(structured_fields) -> List[str]:
+    """构建公司信息两栏各自的Markdown"""
+    get = structured_fields.get
+    return [
+        '\n\n'.join(f"**{label}**: {get(field, '未知')}" for label, field in column)
+        for column in _COMPANY_INFO_COLUMNS
+    ]
+
+
+def build_job_map_data(structured_fields) -> Optional[pd.DataFrame]:
+    """将职位的经纬度构建为地图数据，没有坐标或坐标无法解析时返回None"""
+    longitude = structured_fields.get('经度', '')
+    latitude = structured_fields.get('纬度', '')
+    if not (longitude and latitude):
+        return None
+    try:
+        lat, lon = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        return None
+    return pd.DataFrame({'lat': [lat], 'lon': [lon]})
+
+
+def display_job_detail(doc, job_number, detail):
     """显示单个职位详情"""
-    metadata = doc.metadata
-    structured_fields = metadata.get('structured_fields', {})
+    get = doc.metadata.get
+    get_field = get('structured_fields', {}).get
     
     # 职位标题
-    st.subheader(f"🔹 {metadata.get('job_title', '未知职位')}")
-    st.markdown(f"**🏢 {metadata.get('company_name', '未知公司')}**")
+    st.subheader(f"🔹 {get('job_title', '未知职位')}")
+    st.markdown(f"**🏢 {get('company_name', '未知公司')}**")
     
     # 核心信息卡片
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("💰 薪资待遇", metadata.get('salary', '面议'))
-        st.metric("🎓 学历要求", metadata.get('education', '未知'))
+        st.metric("💰 薪资待遇", get('salary', '面议'))
+        st.metric("🎓 学历要求", get('education', '未知'))
     
     with col2:
-        st.metric("⏰ 工作经验", metadata.get('experience', '未知'))
-        st.metric("📍 工作地点", metadata.get('location', '未知'))
+        st.metric("⏰ 工作经验", get('experience', '未知'))
+        st.metric("📍 工作地点", get('location', '未知'))
     
     with col3:
-        st.metric("🔄 实习机会", structured_fields.get('实习时间', '未知'))
-        st.metric("💼 职位类型", structured_fields.get('职位类型', '未知'))
+        st.metric("🔄 实习机会", get_field('实习时间', '未知'))
+        st.metric("💼 职位类型", get_field('职位类型', '未知'))
     
     # 职位详情
-    job_info = structured_fields.get('职位信息', '')
-    if job_info and job_info.strip():
+    if detail['description']:
         st.subheader("📝 职位详情")
-        formatted_info = format_job_description(job_info)
-        st.markdown(formatted_info)
+        st.markdown(detail['description'])
     
     # 公司信息
     st.subheader("🏢 公司信息")
     
-    company_col1, company_col2 = st.columns(2)
-    
-    with company_col1:
-        st.write(f"**公司全称**: {structured_fields.get('公司全称', '未知')}")
-        st.write(f"**公司规模**: {structured_fields.get('公司规模', '未知')}")
-        st.write(f"**主营业务**: {structured_fields.get('主营业务', '未知')}")
-        st.write(f"**融资情况**: {structured_fields.get('是否融资', '未知')}")
-    
-    with company_col2:
-        st.write(f"**注册资金**: {structured_fields.get('注册资金', '未知')}")
-        st.write(f"**成立时间**: {structured_fields.get('成立时间', '未知')}")
-        st.write(f"**公司类型**: {structured_fields.get('公司类型', '未知')}")
-        st.write(f"**经营状态**: {structured_fields.get('经营状态', '未知')}")
+    for company_col, company_info in zip(st.columns(2), detail['company_columns']):
+        with company_col:
+            st.markdown(company_info)
     
     # 福利待遇
-    benefits = structured_fields.get('公司福利', '')
+    benefits = get_field('公司福利', '')
     if benefits and benefits.strip() and benefits != '[空]':
         st.subheader("🎁 福利待遇")
         st.info(benefits)
     
     # 地理位置
-    longitude = structured_fields.get('经度', '')
-    latitude = structured_fields.get('纬度', '')
+    longitude = get_field('经度', '')
+    latitude = get_field('纬度', '')
     if longitude and latitude:
         st.subheader("📍 地理位置")
-        try:
-            # 创建地图数据
-            import pandas as pd
-            map_data = pd.DataFrame({
-                'lat': [float(latitude)],
-                'lon': [float(longitude)]
-            })
-            st.map(map_data, zoom=12)
-        except:
+        if detail['map_data'] is not None:
+            st.map(detail['map_data'], zoom=12)
+        else:
             st.write(f"经度: {longitude}, 纬度: {latitude}")
 
     # 智能简历建议功能
     st.markdown("---")
-    display_resume_advice_button(doc, job_number)
+    display_resume_advice_section(doc, job_number)
 
 
 def format_job_description(job_info):
     """格式化职位描述"""
     # 简单的格式化
-    formatted = job_info.replace('；', '\n\n• ').replace('。', '\n\n• ')
+    formatted = _DESCRIPTION_SEPARATORS.sub('\n\n• ', job_info)
     lines = [line.strip() for line in formatted.split('\n') if line.strip()]
     return '\n'.join(lines)
 
 
-def display_resume_advice_button(doc, job_number):
-    """显示智能简历建议按钮"""
+@fragment
+def display_resume_advice_section(doc, job_number):
+    """
+    显示智能简历建议按钮及生成界面
+    作为片段渲染，其中的交互只重新执行本片段，不会重新渲染页面上的所有职位
+    """
     st.subheader("🎯 智能简历制作要点")
     st.markdown("基于该岗位要求，为您生成针对性的简历优化建议")
 
@@ -289,32 +380,20 @@ def display_resume_advice_button(doc, job_number):
     col1, col2, col3 = st.columns([2, 1, 2])
 
     with col2:
-        # 生成建议按钮
-        if st.button(
+        # 生成建议按钮：回调在片段重新执行前展开界面
+        st.button(
             "🚀 生成简历建议",
             key=button_key,
             use_container_width=True,
-            help="点击生成针对该岗位的简历制作要点"
-        ):
-            # 设置当前选中的职位
-            st.session_state.selected_job_for_advice = {
-                'doc': doc,
-                'job_number': job_number,
-                'cache_key': cache_key
-            }
-            st.rerun()
-
-    # 如果已选中当前职位，显示建议生成界面
-    if (hasattr(st.session_state, 'selected_job_for_advice') and
-        st.session_state.selected_job_for_advice and
-        st.session_state.selected_job_for_advice['cache_key'] == cache_key):
-
-        display_resume_advice_interface(
-            st.session_state.selected_job_for_advice['doc'],
-            st.session_state.selected_job_for_advice['job_number'],
-            st.session_state.selected_job_for_advice['cache_key']
+            help="点击生成针对该岗位的简历制作要点",
+            on_click=st.session_state.resume_advice_open.add,
+            args=(cache_key,)
         )
 
+    # 如果已展开当前职位，显示建议生成界面
+    if cache_key in st.session_state.resume_advice_open:
+        display_resume_advice_interface(doc, job_number, cache_key)
+
 
 def display_resume_advice_interface(doc, job_number, cache_key):
     """显示简历建议生成界面"""
@@ -385,7 +464,7 @@ def display_resume_advice_interface(doc, job_number, cache_key):
             # 生成建议
             with st.spinner("🤖 正在分析岗位要求，生成简历建议..."):
                 try:
-                    advice_result = st.session_state.resume_advisor.generate_resume_advice(
+                    advice_result = st.session_state.resume_advisor.generate_resume_advice_cached(
                         doc.metadata, user_background
                     )
 
@@ -393,7 +472,6 @@ def display_resume_advice_interface(doc, job_number, cache_key):
                         # 缓存结果
                         st.session_state.resume_advice_cache[cache_key] = advice_result
                         st.success("✅ 简历建议生成成功！")
-                        st.rerun()
                     else:
                         st.error(f"❌ 生成简历建议失败: {advice_result.get('error', '未知错误')}")
 
@@ -401,22 +479,22 @@ def display_resume_advice_interface(doc, job_number, cache_key):
                     st.error(f"❌ 生成简历建议时出错: {str(e)}")
 
     with col3:
-        # 关闭按钮
-        if st.button(
+        # 关闭按钮：回调在片段重新执行前收起界面
+        st.button(
             "❌ 关闭",
             key=f"close_{job_number}",
-            use_container_width=True
-        ):
-            st.session_state.selected_job_for_advice = None
-            st.rerun()
+            use_container_width=True,
+            on_click=st.session_state.resume_advice_open.discard,
+            args=(cache_key,)
+        )
 
     # 显示缓存的建议结果
     if cache_key in st.session_state.resume_advice_cache:
         st.markdown("---")
-        display_resume_advice_content(st.session_state.resume_advice_cache[cache_key])
+        display_resume_advice_content(st.session_state.resume_advice_cache[cache_key], job_number)
 
 
-def display_resume_advice_content(advice_result):
+def display_resume_advice_content(advice_result, job_number):
     """显示简历建议内容"""
     if not advice_result['success']:
         st.error(f"❌ {advice_result.get('error', '未知错误')}")
@@ -455,53 +533,45 @@ def display_resume_advice_content(advice_result):
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        if st.button("📋 复制建议内容", use_container_width=True):
+        if st.button("📋 复制建议内容", key=f"copy_{job_number}", use_container_width=True):
             # 这里可以添加复制到剪贴板的功能
             st.success("✅ 建议内容已准备复制（请手动选择文本复制）")
 
     with col2:
-        if st.button("📧 发送到邮箱", use_container_width=True):
+        if st.button("📧 发送到邮箱", key=f"email_{job_number}", use_container_width=True):
             st.info("💡 邮箱发送功能开发中...")
 
     with col3:
-        if st.button("💾 保存为文档", use_container_width=True):
+        if st.button("💾 保存为文档", key=f"save_{job_number}", use_container_width=True):
             st.info("💡 文档保存功能开发中...")
 
 
+def summarize_search_results(results) -> Dict[str, int]:
+    """统计搜索结果的职位、公司与地区数量（搜索完成后计算一次）"""
+    metadatas = [doc.metadata for doc in results]
+    return {
+        'job_count': len(metadatas),
+        'company_count': len({m.get('company_name') for m in metadatas} - {None, ''}),
+        'location_count': len({m.get('location') for m in metadatas} - {None, ''}),
+    }
+
+
 def display_search_summary():
     """显示搜索总结"""
     st.header("📊 搜索总结")
     
-    results = st.session_state.search_results
-    
-    # 统计信息
-    companies = set()
-    locations = set()
-    salary_ranges = []
-    
-    for doc in results:
-        metadata = doc.metadata
-        company = metadata.get('company_name', '')
-        location = metadata.get('location', '')
-        salary = metadata.get('salary', '')
-        
-        if company:
-            companies.add(company)
-        if location:
-            locations.add(location)
-        if salary:
-            salary_ranges.append(salary)
+    summary = st.session_state.search_summary
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("📋 职位总数", len(results))
+        st.metric("📋 职位总数", summary['job_count'])
     
     with col2:
-        st.metric("🏢 公司数量", len(companies))
+        st.metric("🏢 公司数量", summary['company_count'])
     
     with col3:
-        st.metric("📍 地区数量", len(locations))
+        st.metric("📍 地区数量", summary['location_count'])
     
     # 建议
     st.subheader("💡 求职建议")
@@ -544,9 +614,11 @@ def main():
         if st.button("🔄 重新搜索", use_container_width=True):
             st.session_state.search_completed = False
             st.session_state.search_results = []
+            st.session_state.search_details = []
+            st.session_state.search_summary = {}
             # 清除简历建议相关状态
             st.session_state.resume_advice_cache = {}
-            st.session_state.selected_job_for_advice = None
+            st.session_state.resume_advice_open = set()
             st.rerun()
     
     # 页脚
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多关键词匹配器
+基于 Aho-Corasick 自动机，一次线性扫描即可找出文本中出现的所有关键词
+优先使用 pyahocorasick（C 实现），未安装时回退到纯 Python 实现
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class _PyAutomaton:
+    """纯 Python 的 Aho-Corasick 自动机（pyahocorasick 不可用时使用）"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            if keyword not in self._output[state]:
+                self._output[state].append(keyword)
+
+        # 广度优先构建失败指针
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def iter(self, text: str) -> Iterator[Tuple[int, str]]:
+        """按结束位置依次产出 (结束下标, 关键词)"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword in output[state]:
+                yield index, keyword
+
+
+class KeywordMatcher:
+    """关键词匹配器"""
+
+    def __init__(self, keywords: Iterable[str]):
+        keywords = [kw for kw in dict.fromkeys(keywords) if kw]
+        self.keywords = tuple(keywords)
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        else:
+            self._automaton = _PyAutomaton(keywords)
+
+    def iter(self, text: str) -> Iterator[str]:
+        """按出现顺序产出文本中命中的关键词（可能重复）"""
+        if not text or not self.keywords:
+            return
+        for _, keyword in self._automaton.iter(text):
+            yield keyword
+
+    def find_all(self, text: str) -> List[str]:
+        """获取文本中命中的所有关键词（去重，保持出现顺序）"""
+        return list(dict.fromkeys(self.iter(text)))
+
+    def search(self, text: str) -> Optional[str]:
+        """获取文本中第一个命中的关键词"""
+        return next(self.iter(text), None)
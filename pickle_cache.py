@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+磁盘缓存模块
+文档解析结果、简历建议等以pickle文件缓存在磁盘上，跨进程、跨重启复用
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Optional
+
+
+def cache_file_path(cache_dir: str, key: str, version: int) -> str:
+    """根据缓存键与格式版本生成缓存文件路径，版本变化后旧缓存自然失效"""
+    digest = hashlib.blake2b(f"v{version}|{key}".encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, f"{digest}.pkl")
+
+
+def read_pickle_cache(cache_path: str, max_age: Optional[float] = None) -> Any:
+    """
+    读取缓存，未命中、过期或损坏时返回None
+
+    Args:
+        cache_path: 缓存文件路径
+        max_age: 缓存有效期（秒），None表示不过期
+    """
+    try:
+        if max_age is not None and time.time() - os.path.getmtime(cache_path) > max_age:
+            return None
+        with open(cache_path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"读取缓存失败 {cache_path}: {e}")
+        return None
+
+
+def write_pickle_cache(cache_path: str, value: Any):
+    """写入缓存（先写唯一的临时文件再替换，并发的进程和线程不会读到或覆盖半个文件）"""
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    except Exception as e:
+        print(f"写入缓存失败 {cache_path}: {e}")
@@ -140,12 +140,20 @@ def create_rag_system(documents_dir: str, vector_store_path: str = "vector_store
 
 
 def load_existing_rag_system(vector_store_path: str = "vector_store", 
-                           system_prompt: str = "", use_streaming: bool = True):
-    """加载现有的RAG系统"""
+                           system_prompt: str = "", use_streaming: bool = True, vector_store=None):
+    """
+    加载现有的RAG系统
+    
+    Args:
+        vector_store: 调用方已加载的向量存储，提供时直接复用，不再从磁盘重复加载
+    """
     rag = RAGSystem(vector_store_path)
     
     # 加载向量存储
-    rag.load_existing_vector_store()
+    if vector_store is not None:
+        rag.vector_store = vector_store
+    else:
+        rag.load_existing_vector_store()
     
     # 设置问答系统
     rag.setup_qa_system(system_prompt, use_streaming)
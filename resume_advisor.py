@@ -5,10 +5,26 @@
 基于岗位信息生成针对性的简历制作要点，提高投递成功率
 """
 
+import json
 import os
 from typing import Dict, List, Optional
 from rag_core import RAGSystem
 from qa_chain import create_llm
+from pickle_cache import cache_file_path, read_pickle_cache, write_pickle_cache
+
+
+# 简历建议缓存目录（位于本模块所在目录）：相同岗位与背景信息的建议跨会话、跨重启复用，不再重复调用大模型
+_ADVICE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_resume_advice_cache")
+# 建议格式版本，提示词或返回结构变化时递增，使旧缓存失效
+_ADVICE_CACHE_VERSION = 1
+# 缓存有效期（秒），过期后重新生成，使建议随模型与岗位数据更新
+_ADVICE_CACHE_TTL = 7 * 24 * 3600
+
+
+def _advice_cache_path(job_metadata: Dict, user_background: Optional[Dict]) -> str:
+    """根据岗位元数据与用户背景信息的内容生成缓存文件路径"""
+    key = json.dumps([job_metadata, user_background or {}], sort_keys=True, ensure_ascii=False, default=str)
+    return cache_file_path(_ADVICE_CACHE_DIR, key, _ADVICE_CACHE_VERSION)
 
 
 class ResumeAdvisor:
@@ -56,6 +72,21 @@ class ResumeAdvisor:
                 "error": f"生成简历建议时出错: {str(e)}"
             }
     
+    def generate_resume_advice_cached(self, job_metadata: Dict, user_background: Optional[Dict] = None) -> Dict:
+        """
+        生成简历建议，按岗位元数据与用户背景信息的内容缓存到磁盘
+        只缓存生成成功的结果，参数与返回值同 generate_resume_advice
+        """
+        cache_path = _advice_cache_path(job_metadata, user_background)
+        cached = read_pickle_cache(cache_path, max_age=_ADVICE_CACHE_TTL)
+        if cached is not None:
+            return cached
+        
+        advice_result = self.generate_resume_advice(job_metadata, user_background)
+        if advice_result.get("success"):
+            write_pickle_cache(cache_path, advice_result)
+        return advice_result
+    
     def _extract_job_requirements(self, job_metadata: Dict) -> Dict:
         """提取岗位关键要求信息"""
         structured_fields = job_metadata.get('structured_fields', {})
@@ -39,6 +39,16 @@ class SimpleJobFinder:
             print(f"❌ 初始化失败: {e}")
             return False
     
+    def new_session(self) -> "SimpleJobFinder":
+        """
+        基于当前实例创建新的会话实例
+        共享已加载的向量存储与RAG系统，用户需求各自独立
+        """
+        session = SimpleJobFinder()
+        session.rag_system = self.rag_system
+        session.vector_manager = self.vector_manager
+        return session
+    
     def start_job_search(self):
         """开始求职搜索流程"""
         print("🎯 欢迎使用智能求职助手！")
@@ -6,7 +6,8 @@
 """
 
 import os
-from typing import List
+from itertools import islice
+from typing import Iterable, List
 from dotenv import load_dotenv
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import DashScopeEmbeddings
@@ -15,6 +16,12 @@ from langchain.schema import Document
 # 加载环境变量
 load_dotenv()
 
+# 向量数量达到该值时将精确检索的Flat索引转换为HNSW图索引（近似检索，查询为亚线性复杂度）
+HNSW_MIN_VECTORS = 50000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
 
 def get_api_key():
     """获取API密钥"""
@@ -33,28 +40,128 @@ def create_embeddings():
     )
 
 
-def create_vector_store(chunks: List[Document], save_path: str):
-    """使用文本块创建向量存储并保存到本地"""
-    embeddings = create_embeddings()
+def create_vector_store(chunks: List[Document], save_path: str, embeddings=None):
+    """使用文本块创建向量存储并保存到本地（embeddings 为None时新建嵌入模型）"""
+    if embeddings is None:
+        embeddings = create_embeddings()
     vector_store = FAISS.from_documents(chunks, embeddings)
+    use_hnsw_index(vector_store)
     # 将向量存储保存到磁盘
     vector_store.save_local(save_path)
     return vector_store
 
 
-def load_vector_store(load_path: str):
-    """从本地加载向量存储"""
-    embeddings = create_embeddings()
+def create_vector_store_batched(chunks: Iterable[Document], save_path: str, batch_size: int = 1000,
+                                embeddings=None):
+    """
+    分批创建向量存储并保存到本地
+    chunks 可以是生成器，内存中只保留当前批次的文本块；embeddings 为None时新建嵌入模型
+
+    Returns:
+        向量存储；没有任何文本块时返回None
+    """
+    if embeddings is None:
+        embeddings = create_embeddings()
+    chunk_iter = iter(chunks)
+    vector_store = None
+
+    while True:
+        batch = list(islice(chunk_iter, batch_size))
+        if not batch:
+            break
+        if vector_store is None:
+            vector_store = FAISS.from_documents(batch, embeddings)
+        else:
+            vector_store.add_documents(batch)
+
+    if vector_store is not None:
+        use_hnsw_index(vector_store)
+        vector_store.save_local(save_path)
+    return vector_store
+
+
+def use_hnsw_index(vector_store, min_vectors: int = HNSW_MIN_VECTORS) -> bool:
+    """
+    向量数量较多时将向量存储的Flat索引替换为HNSW索引
+    向量按原顺序写入新索引，docstore 与 index_to_docstore_id 保持不变，后续仍可继续添加文档
+
+    Returns:
+        是否进行了替换
+    """
+    import faiss
+
+    index = vector_store.index
+    if index.ntotal < min_vectors or not isinstance(index, faiss.IndexFlat):
+        return False
+
+    hnsw_index = _new_hnsw_index(index.d, index.metric_type)
+    hnsw_index.add(index.reconstruct_n(0, index.ntotal))
+    vector_store.index = hnsw_index
+    return True
+
+
+def _new_hnsw_index(dimension: int, metric_type):
+    """创建空的HNSW索引"""
+    import faiss
+
+    hnsw_index = faiss.IndexHNSWFlat(dimension, HNSW_M, metric_type)
+    hnsw_index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    hnsw_index.hnsw.efSearch = HNSW_EF_SEARCH
+    return hnsw_index
+
+
+def delete_vectors(vector_store, ids: List[str]):
+    """
+    从向量存储中删除指定ID的文本块
+    HNSW索引不支持删除向量：从索引取回其余向量的原始数据重新建图并重排ID映射，无需重新计算嵌入
+    """
+    index = vector_store.index
+    if getattr(index, 'hnsw', None) is None:
+        vector_store.delete(ids)
+        return
+
+    import numpy as np
+
+    removed = set(ids)
+    id_map = vector_store.index_to_docstore_id
+    keep = np.fromiter(
+        (position for position in range(index.ntotal) if id_map[position] not in removed), dtype=np.int64
+    )
+    hnsw_index = _new_hnsw_index(index.d, index.metric_type)
+    if keep.size:
+        hnsw_index.add(index.reconstruct_n(0, index.ntotal)[keep])
+
+    # 新索引建好后再修改文本块存储与ID映射，建图失败时向量存储保持不变
+    vector_store.docstore.delete(list(removed))
+    vector_store.index = hnsw_index
+    vector_store.index_to_docstore_id = {
+        new_position: id_map[int(old_position)] for new_position, old_position in enumerate(keep)
+    }
+
+
+def _prepare_search(vector_store, k: int):
+    """HNSW索引按返回数量设置检索宽度 efSearch"""
+    hnsw = getattr(vector_store.index, 'hnsw', None)
+    if hnsw is not None:
+        hnsw.efSearch = max(k * 4, HNSW_EF_SEARCH)
+
+
+def load_vector_store(load_path: str, embeddings=None):
+    """从本地加载向量存储（embeddings 为None时新建嵌入模型）"""
+    if embeddings is None:
+        embeddings = create_embeddings()
     return FAISS.load_local(load_path, embeddings, allow_dangerous_deserialization=True)
 
 
 def search_documents(vector_store, query: str, k: int = 3):
     """在向量存储中搜索相关文档"""
+    _prepare_search(vector_store, k)
     return vector_store.similarity_search(query, k=k)
 
 
 def search_documents_with_score(vector_store, query: str, k: int = 3):
     """在向量存储中搜索相关文档，返回相似度分数"""
+    _prepare_search(vector_store, k)
     return vector_store.similarity_search_with_score(query, k=k)
 
 